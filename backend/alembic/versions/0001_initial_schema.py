@@ -0,0 +1,145 @@
+"""initial schema
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-14 16:43:04
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '0001'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('email_codes',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('email', sa.String(length=255), nullable=False),
+    sa.Column('purpose', sa.String(length=32), nullable=False),
+    sa.Column('code_hash', sa.String(length=255), nullable=False),
+    sa.Column('is_used', sa.Boolean(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.func.now(), nullable=False),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_email_codes_id'), 'email_codes', ['id'], unique=False)
+    op.create_index(op.f('ix_email_codes_email'), 'email_codes', ['email'], unique=False)
+    op.create_index(op.f('ix_email_codes_is_used'), 'email_codes', ['is_used'], unique=False)
+    op.create_index(op.f('ix_email_codes_purpose'), 'email_codes', ['purpose'], unique=False)
+    op.create_table('users',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('email', sa.String(length=255), nullable=False),
+    sa.Column('hashed_password', sa.String(length=255), nullable=False),
+    sa.Column('name', sa.String(length=255), nullable=True),
+    sa.Column('is_email_verified', sa.Boolean(), server_default='0', nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.func.now(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_users_email'), 'users', ['email'], unique=True)
+    op.create_index(op.f('ix_users_id'), 'users', ['id'], unique=False)
+    op.create_table('friends',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('friend_id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    sa.ForeignKeyConstraint(['friend_id'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id', 'friend_id', name='uq_user_friend')
+    )
+    op.create_index(op.f('ix_friends_friend_id'), 'friends', ['friend_id'], unique=False)
+    op.create_index(op.f('ix_friends_id'), 'friends', ['id'], unique=False)
+    op.create_index(op.f('ix_friends_user_id'), 'friends', ['user_id'], unique=False)
+    op.create_table('wishlists',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('owner_id', sa.Integer(), nullable=False),
+    sa.Column('title', sa.String(length=255), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('cover_image_url', sa.String(length=512), nullable=True),
+    sa.Column('event_date', sa.Date(), nullable=True),
+    sa.Column('is_public', sa.Boolean(), nullable=False),
+    sa.Column('share_slug', sa.String(length=64), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    sa.ForeignKeyConstraint(['owner_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_wishlists_id'), 'wishlists', ['id'], unique=False)
+    op.create_index(op.f('ix_wishlists_owner_id'), 'wishlists', ['owner_id'], unique=False)
+    op.create_index(op.f('ix_wishlists_share_slug'), 'wishlists', ['share_slug'], unique=True)
+    op.create_table('wishlist_items',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('wishlist_id', sa.Integer(), nullable=False),
+    sa.Column('title', sa.String(length=255), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('url', sa.String(length=1024), nullable=True),
+    sa.Column('image_url', sa.String(length=1024), nullable=True),
+    sa.Column('price', sa.Numeric(precision=12, scale=2), nullable=True),
+    sa.Column('currency', sa.String(length=8), nullable=True),
+    sa.Column('is_deleted', sa.Boolean(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    sa.ForeignKeyConstraint(['wishlist_id'], ['wishlists.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('wishlist_id', 'id', name='uq_wishlist_item_per_wishlist')
+    )
+    op.create_index(op.f('ix_wishlist_items_id'), 'wishlist_items', ['id'], unique=False)
+    op.create_index(op.f('ix_wishlist_items_wishlist_id'), 'wishlist_items', ['wishlist_id'], unique=False)
+    op.create_table('contributions',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('item_id', sa.Integer(), nullable=False),
+    sa.Column('contributor_display_name', sa.String(length=255), nullable=False),
+    sa.Column('contributor_contact', sa.String(length=255), nullable=True),
+    sa.Column('amount', sa.Numeric(precision=12, scale=2), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    sa.ForeignKeyConstraint(['item_id'], ['wishlist_items.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('item_id', 'contributor_display_name', 'contributor_contact', name='uq_contribution_item_contributor')
+    )
+    op.create_index(op.f('ix_contributions_id'), 'contributions', ['id'], unique=False)
+    op.create_index(op.f('ix_contributions_item_id'), 'contributions', ['item_id'], unique=False)
+    op.create_table('reservations',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('item_id', sa.Integer(), nullable=False),
+    sa.Column('reserver_display_name', sa.String(length=255), nullable=False),
+    sa.Column('reserver_contact', sa.String(length=255), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    sa.ForeignKeyConstraint(['item_id'], ['wishlist_items.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_reservations_id'), 'reservations', ['id'], unique=False)
+    op.create_index(op.f('ix_reservations_item_id'), 'reservations', ['item_id'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_reservations_item_id'), table_name='reservations')
+    op.drop_index(op.f('ix_reservations_id'), table_name='reservations')
+    op.drop_table('reservations')
+    op.drop_index(op.f('ix_contributions_item_id'), table_name='contributions')
+    op.drop_index(op.f('ix_contributions_id'), table_name='contributions')
+    op.drop_table('contributions')
+    op.drop_index(op.f('ix_wishlist_items_wishlist_id'), table_name='wishlist_items')
+    op.drop_index(op.f('ix_wishlist_items_id'), table_name='wishlist_items')
+    op.drop_table('wishlist_items')
+    op.drop_index(op.f('ix_wishlists_share_slug'), table_name='wishlists')
+    op.drop_index(op.f('ix_wishlists_owner_id'), table_name='wishlists')
+    op.drop_index(op.f('ix_wishlists_id'), table_name='wishlists')
+    op.drop_table('wishlists')
+    op.drop_index(op.f('ix_friends_user_id'), table_name='friends')
+    op.drop_index(op.f('ix_friends_id'), table_name='friends')
+    op.drop_index(op.f('ix_friends_friend_id'), table_name='friends')
+    op.drop_table('friends')
+    op.drop_index(op.f('ix_users_id'), table_name='users')
+    op.drop_index(op.f('ix_users_email'), table_name='users')
+    op.drop_table('users')
+    op.drop_index(op.f('ix_email_codes_purpose'), table_name='email_codes')
+    op.drop_index(op.f('ix_email_codes_is_used'), table_name='email_codes')
+    op.drop_index(op.f('ix_email_codes_email'), table_name='email_codes')
+    op.drop_index(op.f('ix_email_codes_id'), table_name='email_codes')
+    op.drop_table('email_codes')
@@ -0,0 +1,37 @@
+"""partial lookup indexes
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-14 18:05:12
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.drop_index(op.f('ix_email_codes_email'), table_name='email_codes')
+    op.drop_index(op.f('ix_email_codes_is_used'), table_name='email_codes')
+    op.drop_index(op.f('ix_email_codes_purpose'), table_name='email_codes')
+    op.create_index('ix_emailcode_lookup', 'email_codes', ['email', 'purpose', 'expires_at'], unique=False, postgresql_where=sa.text('is_used IS false'))
+    op.drop_index(op.f('ix_friends_user_id'), table_name='friends')
+    op.drop_index(op.f('ix_wishlist_items_wishlist_id'), table_name='wishlist_items')
+    op.create_index('ix_wishitem_list_live', 'wishlist_items', ['wishlist_id'], unique=False, postgresql_where=sa.text('is_deleted IS false'))
+
+
+def downgrade() -> None:
+    op.drop_index('ix_wishitem_list_live', table_name='wishlist_items', postgresql_where=sa.text('is_deleted IS false'))
+    op.create_index(op.f('ix_wishlist_items_wishlist_id'), 'wishlist_items', ['wishlist_id'], unique=False)
+    op.create_index(op.f('ix_friends_user_id'), 'friends', ['user_id'], unique=False)
+    op.drop_index('ix_emailcode_lookup', table_name='email_codes', postgresql_where=sa.text('is_used IS false'))
+    op.create_index(op.f('ix_email_codes_purpose'), 'email_codes', ['purpose'], unique=False)
+    op.create_index(op.f('ix_email_codes_is_used'), 'email_codes', ['is_used'], unique=False)
+    op.create_index(op.f('ix_email_codes_email'), 'email_codes', ['email'], unique=False)
@@ -0,0 +1,25 @@
+"""email code attempts
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-14 18:11:47
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('email_codes', sa.Column('attempts', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('email_codes', 'attempts')
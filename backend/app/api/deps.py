@@ -1,26 +1,49 @@
 from typing import Annotated
 
-from fastapi import Depends, HTTPException, status
-from fastapi.security import OAuth2PasswordBearer
+import httpx
+from fastapi import Depends, HTTPException, Request, status
 from sqlalchemy.orm import Session
 
-from app.core.security import decode_access_token
+from app.core.auth_cache import cache_user_id, get_cached_user_id
+from app.core.security import decode_access_token_payload, password_fingerprint
 from app.db.session import get_db
 from app.models import User
 
 
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
+def _get_bearer_token(request: Request) -> str:
+    authorization = request.headers.get("authorization")
+    if not authorization or authorization[:7].lower() != "bearer ":
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return authorization[7:]
 
 
 def get_current_user(
-    token: Annotated[str, Depends(oauth2_scheme)],
+    request: Request,
     db: Annotated[Session, Depends(get_db)],
 ) -> User:
-    subject = decode_access_token(token)
-    if not subject:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Could not validate credentials")
+    token = _get_bearer_token(request)
+    user_id = get_cached_user_id(token)
+    payload = None
+    if user_id is None:
+        payload = decode_access_token_payload(token)
+        if not payload or payload.get("sub") is None:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Could not validate credentials")
+        user_id = int(payload["sub"])
 
-    user = db.query(User).filter(User.id == int(subject)).first()
+    user = db.get(User, user_id)
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+
+    if payload is not None:
+        if payload.get("pwd") != password_fingerprint(user.hashed_password):
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Could not validate credentials")
+        cache_user_id(token, user.id, float(payload["exp"]))
     return user
+
+
+def get_http_client(request: Request) -> httpx.AsyncClient:
+    return request.app.state.http_client
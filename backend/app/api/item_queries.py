@@ -0,0 +1,72 @@
+from typing import Any
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session, joinedload, selectinload
+
+from app.models import Contribution, Reservation, WishlistItem
+
+
+_ITEM_COLUMNS = (
+    "id",
+    "wishlist_id",
+    "title",
+    "description",
+    "url",
+    "image_url",
+    "price",
+    "currency",
+    "is_deleted",
+    "created_at",
+    "updated_at",
+)
+
+
+def _aggregated_items(db: Session, *conditions: Any) -> list[dict[str, Any]]:
+    rows = db.execute(
+        select(
+            WishlistItem,
+            func.coalesce(func.sum(Contribution.amount), 0).label("collected_amount"),
+            func.count(Contribution.id).label("contributions_count"),
+            Reservation.id.label("reservation_id"),
+        )
+        .outerjoin(Contribution, Contribution.item_id == WishlistItem.id)
+        .outerjoin(Reservation, Reservation.item_id == WishlistItem.id)
+        .where(*conditions)
+        .group_by(WishlistItem.id, Reservation.id)
+        .order_by(WishlistItem.id)
+    ).all()
+
+    items: list[dict[str, Any]] = []
+    for item, collected_amount, contributions_count, reservation_id in rows:
+        data = {column: getattr(item, column) for column in _ITEM_COLUMNS}
+        data["is_reserved"] = reservation_id is not None
+        data["collected_amount"] = float(collected_amount)
+        data["contributions_count"] = contributions_count
+        data["total_amount_target"] = float(item.price) if item.price is not None else None
+        items.append(data)
+    return items
+
+
+def list_live_items(db: Session, wishlist_id: int) -> list[dict[str, Any]]:
+    """Live items of a wishlist with reservation and contribution aggregates, in one query."""
+    return _aggregated_items(db, WishlistItem.wishlist_id == wishlist_id, WishlistItem.is_deleted.is_(False))
+
+
+def load_item_row(db: Session, item_id: int) -> dict[str, Any]:
+    """One item with the same aggregates as list_live_items, in a single SELECT and without the wishlist."""
+    (item,) = _aggregated_items(db, WishlistItem.id == item_id)
+    return item
+
+
+def load_item_for_read(db: Session, item_id: int) -> WishlistItem:
+    """Item with its wishlist, reservation and contributions loaded, ready for WishlistItemRead."""
+    return db.execute(
+        select(WishlistItem)
+        .options(
+            joinedload(WishlistItem.wishlist),
+            joinedload(WishlistItem.reservation),
+            selectinload(WishlistItem.contributions),
+        )
+        .where(WishlistItem.id == item_id)
+        .execution_options(populate_existing=True)
+    ).scalar_one()
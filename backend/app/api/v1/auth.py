@@ -2,15 +2,25 @@ from datetime import datetime, timedelta
 from typing import Annotated
 import logging
 import secrets
-import smtplib
-from email.message import EmailMessage
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy import exists, select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
+from app.core.auth_cache import invalidate_user
 from app.core.config import settings
-from app.core.security import create_access_token, hash_password, verify_password
+from app.core.mailer import send_email
+from app.core.security import (
+    DUMMY_PASSWORD_HASH,
+    create_access_token,
+    hash_email_code,
+    hash_password,
+    password_needs_rehash,
+    verify_email_code,
+    verify_password,
+)
 from app.db.session import get_db
 from app.api.deps import get_current_user
 from app.models import EmailCode, User
@@ -31,18 +41,30 @@ router = APIRouter(prefix="/auth", tags=["auth"])
 
 
 def _generate_code() -> str:
-    digits = "0123456789"
-    return "".join(secrets.choice(digits) for _ in range(4))
+    return f"{secrets.randbelow(10_000):04d}"
+
 
+def _create_email_code(db: Session, email: str, purpose: str) -> str | None:
+    expires_at = datetime.utcnow() + timedelta(minutes=settings.email_code_ttl_minutes)
+    # A code issued within the resend interval expires later than this cutoff.
+    recent_cutoff = expires_at - timedelta(seconds=settings.email_code_resend_interval_seconds)
+    recently_sent = db.query(
+        exists().where(
+            EmailCode.email == email,
+            EmailCode.purpose == purpose,
+            EmailCode.is_used.is_(False),
+            EmailCode.expires_at > recent_cutoff,
+        )
+    ).scalar()
+    if recently_sent:
+        logger.info("Email code for %s (%s) was sent recently; skipping", email, purpose)
+        return None
 
-def _create_email_code(db: Session, email: str, purpose: str) -> str:
     code = _generate_code()
-    code_hash = hash_password(code)
-    expires_at = datetime.utcnow() + timedelta(minutes=15)
     record = EmailCode(
         email=email,
         purpose=purpose,
-        code_hash=code_hash,
+        code_hash=hash_email_code(code),
         expires_at=expires_at,
     )
     db.add(record)
@@ -51,36 +73,29 @@ def _create_email_code(db: Session, email: str, purpose: str) -> str:
     return code
 
 
-def _send_email(to_email: str, subject: str, body: str) -> None:
-    if not settings.smtp_host or not settings.smtp_from:
-        logger.warning(
-            "SMTP is not configured; skipping email send to %s with subject %s",
-            to_email,
-            subject,
+def _get_active_email_code(db: Session, email: str, purpose: str) -> tuple[User, EmailCode] | None:
+    now = datetime.utcnow()
+    row = db.execute(
+        select(User, EmailCode)
+        .join(EmailCode, EmailCode.email == User.email)
+        .where(
+            User.email == email,
+            EmailCode.purpose == purpose,
+            EmailCode.is_used.is_(False),
+            EmailCode.expires_at > now,
+            EmailCode.attempts < settings.email_code_max_attempts,
         )
-        return
-    try:
-        with smtplib.SMTP(settings.smtp_host, settings.smtp_port) as server:
-            if settings.smtp_use_tls:
-                server.starttls()
-            if settings.smtp_user and settings.smtp_password:
-                server.login(settings.smtp_user, settings.smtp_password)
-            message = EmailMessage()
-            message["From"] = settings.smtp_from
-            message["To"] = to_email
-            message["Subject"] = subject
-            message.set_content(body)
-            server.send_message(message)
-    except Exception as exc:
-        logger.error("Failed to send email to %s: %s", to_email, exc)
+        .order_by(EmailCode.created_at.desc(), EmailCode.id.desc())
+        .limit(1)
+        .with_for_update(of=EmailCode, skip_locked=True)
+    ).first()
+    if row is None:
+        return None
+    return row[0], row[1]
 
 
 @router.post("/register", response_model=UserRead, status_code=status.HTTP_201_CREATED)
 def register_user(payload: UserCreate, db: Annotated[Session, Depends(get_db)]) -> User:
-    existing = db.query(User).filter(User.email == payload.email).first()
-    if existing:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered")
-
     user = User(
         email=payload.email,
         hashed_password=hash_password(payload.password),
@@ -88,8 +103,11 @@ def register_user(payload: UserCreate, db: Annotated[Session, Depends(get_db)])
         is_email_verified=False,
     )
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered")
     return user
 
 
@@ -99,31 +117,34 @@ def login(
     db: Annotated[Session, Depends(get_db)],
 ) -> Token:
     user = db.query(User).filter(User.email == form_data.username).first()
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User not found",
-        )
-    if not verify_password(form_data.password, user.hashed_password):
+    password_ok = verify_password(form_data.password, user.hashed_password if user else DUMMY_PASSWORD_HASH)
+    if not user or not password_ok:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
         )
+    if password_needs_rehash(user.hashed_password):
+        user.hashed_password = hash_password(form_data.password)
+        db.commit()
 
-    access_token = create_access_token(str(user.id))
+    access_token = create_access_token(str(user.id), user.hashed_password)
     return Token(access_token=access_token)
 
 
 @router.post("/request-password-reset")
 def request_password_reset(
     payload: PasswordResetRequest,
+    background_tasks: BackgroundTasks,
     db: Annotated[Session, Depends(get_db)],
 ) -> dict:
-    user = db.query(User).filter(User.email == payload.email).first()
-    if not user:
+    user_exists = db.query(exists().where(User.email == payload.email)).scalar()
+    if not user_exists:
         return {"ok": True}
     code = _create_email_code(db, payload.email, "reset_password")
-    _send_email(
+    if code is None:
+        return {"ok": True}
+    background_tasks.add_task(
+        send_email,
         payload.email,
         "Код для сброса пароля",
         f"Ваш код для сброса пароля: {code}",
@@ -133,42 +154,36 @@ def request_password_reset(
 
 @router.post("/confirm-password-reset", status_code=status.HTTP_204_NO_CONTENT)
 def confirm_password_reset(payload: PasswordResetConfirm, db: Annotated[Session, Depends(get_db)]) -> None:
-    user = db.query(User).filter(User.email == payload.email).first()
-    if not user:
+    active = _get_active_email_code(db, payload.email, "reset_password")
+    if not active:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid code or email")
 
-    now = datetime.utcnow()
-    code_record = (
-        db.query(EmailCode)
-        .filter(
-            EmailCode.email == payload.email,
-            EmailCode.purpose == "reset_password",
-            EmailCode.is_used.is_(False),
-            EmailCode.expires_at > now,
-        )
-        .order_by(EmailCode.created_at.desc())
-        .first()
-    )
-    if not code_record or not verify_password(payload.code, code_record.code_hash):
+    user, code_record = active
+    if not verify_email_code(payload.code, code_record.code_hash):
+        code_record.attempts += 1
+        db.commit()
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid code or email")
 
     user.hashed_password = hash_password(payload.new_password)
     code_record.is_used = True
-    db.add(user)
-    db.add(code_record)
     db.commit()
+    invalidate_user(user.id)
 
 
 @router.post("/request-login-code")
 def request_login_code(
     payload: LoginCodeRequest,
+    background_tasks: BackgroundTasks,
     db: Annotated[Session, Depends(get_db)],
 ) -> dict:
-    user = db.query(User).filter(User.email == payload.email).first()
-    if not user:
+    user_exists = db.query(exists().where(User.email == payload.email)).scalar()
+    if not user_exists:
         return {"ok": True}
     code = _create_email_code(db, payload.email, "login")
-    _send_email(
+    if code is None:
+        return {"ok": True}
+    background_tasks.add_task(
+        send_email,
         payload.email,
         "Код для входа в Wishlist",
         f"Ваш код для входа: {code}",
@@ -178,32 +193,21 @@ def request_login_code(
 
 @router.post("/login-with-code", response_model=Token)
 def login_with_code(payload: LoginCodeConfirm, db: Annotated[Session, Depends(get_db)]) -> Token:
-    user = db.query(User).filter(User.email == payload.email).first()
-    if not user:
+    active = _get_active_email_code(db, payload.email, "login")
+    if not active:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Incorrect email or code")
 
-    now = datetime.utcnow()
-    code_record = (
-        db.query(EmailCode)
-        .filter(
-            EmailCode.email == payload.email,
-            EmailCode.purpose == "login",
-            EmailCode.is_used.is_(False),
-            EmailCode.expires_at > now,
-        )
-        .order_by(EmailCode.created_at.desc())
-        .first()
-    )
-    if not code_record or not verify_password(payload.code, code_record.code_hash):
+    user, code_record = active
+    if not verify_email_code(payload.code, code_record.code_hash):
+        code_record.attempts += 1
+        db.commit()
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Incorrect email or code")
 
     user.is_email_verified = True
     code_record.is_used = True
-    db.add(user)
-    db.add(code_record)
     db.commit()
 
-    access_token = create_access_token(str(user.id))
+    access_token = create_access_token(str(user.id), user.hashed_password)
     return Token(access_token=access_token)
 
 
@@ -1,6 +1,9 @@
+from collections.abc import Sequence
 from typing import Annotated
 
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import Row, exists, select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 from app.api.deps import get_current_user
@@ -17,22 +20,17 @@ router = APIRouter(prefix="/friends", tags=["friends"])
 def list_friends(
     db: Annotated[Session, Depends(get_db)],
     current_user: Annotated[User, Depends(get_current_user)],
-) -> list[FriendRead]:
-    friends = db.query(Friend).filter(Friend.user_id == current_user.id).all()
-    result: list[FriendRead] = []
-    for friend in friends:
-        friend_user = db.query(User).filter(User.id == friend.friend_id).first()
-        if not friend_user:
-            continue
-        result.append(
-            FriendRead(
-                id=friend.id,
-                friend_id=friend.friend_id,
-                friend_email=friend_user.email,
-                friend_name=friend_user.name,
-            ),
+) -> Sequence[Row]:
+    return db.execute(
+        select(
+            Friend.id,
+            Friend.friend_id,
+            User.email.label("friend_email"),
+            User.name.label("friend_name"),
         )
-    return result
+        .join(User, User.id == Friend.friend_id)
+        .where(Friend.user_id == current_user.id)
+    ).all()
 
 
 @router.post("/", response_model=FriendRead, status_code=status.HTTP_201_CREATED)
@@ -48,20 +46,14 @@ def add_friend(
     if friend_user.id == current_user.id:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cannot add yourself as a friend")
 
-    existing = (
-        db.query(Friend)
-        .filter(Friend.user_id == current_user.id, Friend.friend_id == friend_user.id)
-        .first()
-    )
-    if existing:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Already friends")
-
     friendship = Friend(user_id=current_user.id, friend_id=friend_user.id)
     reverse_friendship = Friend(user_id=friend_user.id, friend_id=current_user.id)
-    db.add(friendship)
-    db.add(reverse_friendship)
-    db.commit()
-    db.refresh(friendship)
+    db.add_all([friendship, reverse_friendship])
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Already friends")
 
     return FriendRead(
         id=friendship.id,
@@ -103,12 +95,10 @@ def get_friend_public_wishlists(
     db: Annotated[Session, Depends(get_db)],
     current_user: Annotated[User, Depends(get_current_user)],
 ) -> list[Wishlist]:
-    friendship = (
-        db.query(Friend)
-        .filter(Friend.user_id == current_user.id, Friend.friend_id == friend_id)
-        .first()
-    )
-    if not friendship:
+    is_friend = db.query(
+        exists().where(Friend.user_id == current_user.id, Friend.friend_id == friend_id)
+    ).scalar()
+    if not is_friend:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Friend not found")
 
     wishlists = (
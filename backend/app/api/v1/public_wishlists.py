@@ -1,12 +1,17 @@
-from typing import Annotated
+from typing import Annotated, Any
 import logging
 
-from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request, status
+from sqlalchemy import String, and_, exists, insert, literal, select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
+from app.api.item_queries import list_live_items, load_item_row
+from app.core.slug_cache import cache_public_wishlist_ids, get_public_wishlist_ids
 from app.db.session import get_db
 from app.models import Contribution, Reservation, Wishlist, WishlistItem
 from app.realtime.manager import manager
+from app.realtime.payloads import item_row_updated_message
 from app.schemas.reservation import ContributionCreate, ContributionRead, ReservationCreate, ReservationRead
 from app.schemas.wishlist import WishlistItemRead, WishlistRead
 
@@ -15,6 +20,48 @@ router = APIRouter(prefix="/public/wishlists", tags=["public-wishlists"])
 logger = logging.getLogger(__name__)
 
 
+def _public_item_conditions(share_slug: str, item_id: int) -> tuple:
+    return (
+        WishlistItem.id == item_id,
+        WishlistItem.is_deleted.is_(False),
+        Wishlist.share_slug == share_slug,
+        Wishlist.is_public.is_(True),
+    )
+
+
+def _resolve_public_wishlist_id(db: Session, share_slug: str) -> int:
+    cached = get_public_wishlist_ids(share_slug)
+    if cached is not None:
+        return cached[0]
+
+    row = db.execute(
+        select(Wishlist.id, Wishlist.owner_id).where(Wishlist.share_slug == share_slug, Wishlist.is_public.is_(True))
+    ).first()
+    if row is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Wishlist not found")
+    cache_public_wishlist_ids(share_slug, row.id, row.owner_id)
+    return row.id
+
+
+def _ensure_public_item_exists(db: Session, share_slug: str, item_id: int) -> None:
+    row = db.execute(
+        select(Wishlist.id, WishlistItem.id)
+        .outerjoin(
+            WishlistItem,
+            and_(
+                WishlistItem.wishlist_id == Wishlist.id,
+                WishlistItem.id == item_id,
+                WishlistItem.is_deleted.is_(False),
+            ),
+        )
+        .where(Wishlist.share_slug == share_slug, Wishlist.is_public.is_(True))
+    ).first()
+    if row is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Wishlist not found")
+    if row[1] is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Item not found")
+
+
 @router.get("/{share_slug}", response_model=WishlistRead)
 def get_public_wishlist(
     share_slug: str,
@@ -24,6 +71,7 @@ def get_public_wishlist(
     if not wishlist:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Wishlist not found")
 
+    cache_public_wishlist_ids(share_slug, wishlist.id, wishlist.owner_id)
     return wishlist
 
 
@@ -31,17 +79,9 @@ def get_public_wishlist(
 def get_public_wishlist_items(
     share_slug: str,
     db: Annotated[Session, Depends(get_db)],
-) -> list[WishlistItem]:
-    wishlist = db.query(Wishlist).filter(Wishlist.share_slug == share_slug, Wishlist.is_public.is_(True)).first()
-    if not wishlist:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Wishlist not found")
-
-    items = (
-        db.query(WishlistItem)
-        .filter(WishlistItem.wishlist_id == wishlist.id, WishlistItem.is_deleted.is_(False))
-        .all()
-    )
-    return items
+) -> list[dict[str, Any]]:
+    wishlist_id = _resolve_public_wishlist_id(db, share_slug)
+    return list_live_items(db, wishlist_id)
 
 
 @router.get(
@@ -53,19 +93,20 @@ def get_public_wishlist_item(
     item_id: int,
     db: Annotated[Session, Depends(get_db)],
 ) -> WishlistItem:
-    wishlist = db.query(Wishlist).filter(Wishlist.share_slug == share_slug, Wishlist.is_public.is_(True)).first()
-    if not wishlist:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Wishlist not found")
-
-    item = (
-        db.query(WishlistItem)
-        .filter(
+    cached = get_public_wishlist_ids(share_slug)
+    query = select(WishlistItem)
+    if cached is not None:
+        query = query.where(
             WishlistItem.id == item_id,
-            WishlistItem.wishlist_id == wishlist.id,
+            WishlistItem.wishlist_id == cached[0],
             WishlistItem.is_deleted.is_(False),
         )
-        .first()
-    )
+    else:
+        # One JOIN instead of resolving the wishlist first; both misses are reported as a missing item.
+        query = query.join(Wishlist, Wishlist.id == WishlistItem.wishlist_id).where(
+            *_public_item_conditions(share_slug, item_id)
+        )
+    item = db.execute(query).scalar_one_or_none()
     if not item:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Item not found")
 
@@ -77,13 +118,14 @@ def get_public_wishlist_item(
     response_model=ReservationRead,
     status_code=status.HTTP_201_CREATED,
 )
-async def reserve_item(
+def reserve_item(
     share_slug: str,
     item_id: int,
     payload: ReservationCreate,
     request: Request,
+    background_tasks: BackgroundTasks,
     db: Annotated[Session, Depends(get_db)],
-) -> Reservation:
+) -> ReservationRead:
     logger.info(
         "reserve_item called",
         extra={
@@ -94,49 +136,58 @@ async def reserve_item(
     )
 
     try:
-        wishlist = db.query(Wishlist).filter(Wishlist.share_slug == share_slug, Wishlist.is_public.is_(True)).first()
-        if not wishlist:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Wishlist not found")
-
-        item = (
-            db.query(WishlistItem)
-            .filter(
-                WishlistItem.id == item_id,
-                WishlistItem.wishlist_id == wishlist.id,
-                WishlistItem.is_deleted.is_(False),
+        stmt = (
+            insert(Reservation)
+            .from_select(
+                ["item_id", "reserver_display_name", "reserver_contact"],
+                select(
+                    WishlistItem.id,
+                    literal(payload.display_name, String),
+                    literal(payload.contact, String),
+                )
+                .join(Wishlist, Wishlist.id == WishlistItem.wishlist_id)
+                .where(
+                    *_public_item_conditions(share_slug, item_id),
+                    ~exists().where(Reservation.item_id == WishlistItem.id),
+                ),
             )
-            .first()
+            .returning(Reservation.id, Reservation.created_at)
         )
-        if not item:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Item not found")
-
-        existing = db.query(Reservation).filter(Reservation.item_id == item.id).first()
-        if existing:
+        try:
+            created = db.execute(stmt).first()
+        except IntegrityError:
+            db.rollback()
+            created = None
+
+        if created is None:
+            _ensure_public_item_exists(db, share_slug, item_id)
+            existing = db.execute(select(Reservation).where(Reservation.item_id == item_id)).scalar_one_or_none()
             idempotency_key = request.headers.get("Idempotency-Key")
-            if idempotency_key:
+            if existing and idempotency_key:
                 logger.info(
                     "reserve_item idempotent hit",
                     extra={"share_slug": share_slug, "item_id": item_id},
                 )
-                return existing
+                return ReservationRead(
+                    id=existing.id,
+                    item_id=existing.item_id,
+                    display_name=existing.reserver_display_name,
+                    created_at=existing.created_at,
+                )
             raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Item is already reserved")
 
-        reservation = Reservation(
-            item_id=item.id,
-            reserver_display_name=payload.display_name,
-            reserver_contact=payload.contact,
-        )
-        db.add(reservation)
         db.commit()
-        db.refresh(reservation)
+        reservation = ReservationRead(
+            id=created.id,
+            item_id=item_id,
+            display_name=payload.display_name,
+            created_at=created.created_at,
+        )
 
-        db.refresh(item)
-        await manager.broadcast(
+        background_tasks.add_task(
+            manager.broadcast,
             share_slug,
-            {
-                "type": "ITEM_UPDATED",
-                "item": WishlistItemRead.model_validate(item).model_dump(),
-            },
+            item_row_updated_message(load_item_row(db, item_id)),
         )
 
         logger.info(
@@ -162,12 +213,13 @@ async def reserve_item(
     response_model=ContributionRead,
     status_code=status.HTTP_201_CREATED,
 )
-async def contribute_to_item(
+def contribute_to_item(
     share_slug: str,
     item_id: int,
     payload: ContributionCreate,
+    background_tasks: BackgroundTasks,
     db: Annotated[Session, Depends(get_db)],
-) -> Contribution:
+) -> ContributionRead:
     logger.info(
         "contribute_to_item called",
         extra={
@@ -179,54 +231,54 @@ async def contribute_to_item(
     )
 
     try:
-        wishlist = db.query(Wishlist).filter(Wishlist.share_slug == share_slug, Wishlist.is_public.is_(True)).first()
-        if not wishlist:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Wishlist not found")
-
-        item = (
-            db.query(WishlistItem)
-            .filter(
-                WishlistItem.id == item_id,
-                WishlistItem.wishlist_id == wishlist.id,
-                WishlistItem.is_deleted.is_(False),
-            )
-            .first()
-        )
-        if not item:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Item not found")
-
-        existing = (
-            db.query(Contribution)
-            .filter(
-                Contribution.item_id == item.id,
-                Contribution.contributor_display_name == payload.display_name,
-                Contribution.contributor_contact == payload.contact,
+        stmt = (
+            insert(Contribution)
+            .from_select(
+                ["item_id", "contributor_display_name", "contributor_contact", "amount"],
+                select(
+                    WishlistItem.id,
+                    literal(payload.display_name, String),
+                    literal(payload.contact, String),
+                    literal(payload.amount, Contribution.amount.type),
+                )
+                .join(Wishlist, Wishlist.id == WishlistItem.wishlist_id)
+                .where(
+                    *_public_item_conditions(share_slug, item_id),
+                    ~exists().where(
+                        Contribution.item_id == WishlistItem.id,
+                        Contribution.contributor_display_name == payload.display_name,
+                        Contribution.contributor_contact == payload.contact,
+                    ),
+                ),
             )
-            .first()
+            .returning(Contribution.id, Contribution.created_at)
         )
-        if existing:
+        try:
+            created = db.execute(stmt).first()
+        except IntegrityError:
+            db.rollback()
+            created = None
+
+        if created is None:
+            _ensure_public_item_exists(db, share_slug, item_id)
             raise HTTPException(
                 status_code=status.HTTP_409_CONFLICT,
                 detail="You have already contributed to this item",
             )
 
-        contribution = Contribution(
-            item_id=item.id,
-            contributor_display_name=payload.display_name,
-            contributor_contact=payload.contact,
+        db.commit()
+        contribution = ContributionRead(
+            id=created.id,
+            item_id=item_id,
+            display_name=payload.display_name,
             amount=payload.amount,
+            created_at=created.created_at,
         )
-        db.add(contribution)
-        db.commit()
-        db.refresh(contribution)
 
-        db.refresh(item)
-        await manager.broadcast(
+        background_tasks.add_task(
+            manager.broadcast,
             share_slug,
-            {
-                "type": "ITEM_UPDATED",
-                "item": WishlistItemRead.model_validate(item).model_dump(),
-            },
+            item_row_updated_message(load_item_row(db, item_id)),
         )
 
         logger.info(
@@ -1,16 +1,25 @@
-from typing import Annotated
-from urllib.error import HTTPError, URLError
-from urllib.request import Request, urlopen
-from html.parser import HTMLParser
+from typing import Annotated, Any
 import logging
-
-from fastapi import APIRouter, Depends, HTTPException, Response, status
+import re
+import secrets
+
+import httpx
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Response, status
+from pydantic import TypeAdapter
+from selectolax.parser import HTMLParser
+from sqlalchemy import exists, select, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
-from app.api.deps import get_current_user
+from app.api.deps import get_current_user, get_http_client
+from app.api.item_queries import list_live_items, load_item_for_read
+from app.core.preview_cache import cache_preview, get_cached_preview
+from app.core.slug_cache import invalidate_slug
+from app.core.wishlist_cache import cache_wishlists, get_cached_wishlists, invalidate_wishlists
 from app.db.session import get_db
 from app.models import User, Wishlist, WishlistItem
 from app.realtime.manager import manager
+from app.realtime.payloads import item_updated_message
 from app.schemas.wishlist import (
     WishlistCreate,
     WishlistItemCreate,
@@ -26,22 +35,67 @@ from app.schemas.wishlist import (
 router = APIRouter(prefix="/wishlists", tags=["wishlists"])
 logger = logging.getLogger(__name__)
 
+_SHARE_SLUG_ATTEMPTS = 3
+_wishlist_list_adapter = TypeAdapter(list[WishlistRead])
+
+
+def _get_owned_wishlist(db: Session, wishlist_id: int, user: User) -> Wishlist:
+    wishlist = db.get(Wishlist, wishlist_id)
+    if wishlist is None or wishlist.owner_id != user.id:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Wishlist not found")
+    return wishlist
+
+
+def _update_owned_item(
+    db: Session,
+    wishlist_id: int,
+    item_id: int,
+    user: User,
+    values: dict[str, Any],
+) -> None:
+    """Update a live item of the user's wishlist with a single statement that also checks ownership."""
+    updated_id = db.execute(
+        update(WishlistItem)
+        .where(
+            WishlistItem.id == item_id,
+            WishlistItem.is_deleted.is_(False),
+            WishlistItem.wishlist_id.in_(
+                select(Wishlist.id).where(Wishlist.id == wishlist_id, Wishlist.owner_id == user.id)
+            ),
+        )
+        .values(**values)
+        .returning(WishlistItem.id)
+        .execution_options(synchronize_session=False)
+    ).scalar()
+    if updated_id is None:
+        db.rollback()
+        _get_owned_wishlist(db, wishlist_id, user)
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Item not found")
+    db.commit()
+
 
 @router.get("/", response_model=list[WishlistRead])
 def list_wishlists(
     db: Annotated[Session, Depends(get_db)],
     current_user: Annotated[User, Depends(get_current_user)],
-    response: Response,
-) -> list[Wishlist]:
+) -> Response:
     logger.info("list_wishlists called", extra={"user_id": current_user.id})
-    response.headers["Cache-Control"] = "private, no-store"
-    wishlists = db.query(Wishlist).filter(Wishlist.owner_id == current_user.id).all()
-    return wishlists
+    payload = get_cached_wishlists(current_user.id)
+    if payload is None:
+        wishlists = db.query(Wishlist).filter(Wishlist.owner_id == current_user.id).all()
+        payload = _wishlist_list_adapter.dump_json(wishlists)
+        cache_wishlists(current_user.id, payload)
+    return Response(
+        content=payload,
+        media_type="application/json",
+        headers={"Cache-Control": "private, no-store"},
+    )
 
 
 @router.post("/", response_model=WishlistRead, status_code=status.HTTP_201_CREATED)
-async def create_wishlist(
+def create_wishlist(
     payload: WishlistCreate,
+    background_tasks: BackgroundTasks,
     db: Annotated[Session, Depends(get_db)],
     current_user: Annotated[User, Depends(get_current_user)],
 ) -> Wishlist:
@@ -52,14 +106,23 @@ async def create_wishlist(
         cover_image_url=payload.cover_image_url,
         event_date=payload.event_date,
         is_public=payload.is_public,
-        share_slug=_generate_share_slug(db),
     )
-    db.add(wishlist)
-    db.commit()
-    db.refresh(wishlist)
+    # Slugs are random enough that a collision is rare; let the unique constraint detect it.
+    for attempt in range(_SHARE_SLUG_ATTEMPTS):
+        wishlist.share_slug = secrets.token_urlsafe(8)
+        db.add(wishlist)
+        try:
+            db.commit()
+            break
+        except IntegrityError:
+            db.rollback()
+            if attempt == _SHARE_SLUG_ATTEMPTS - 1:
+                raise
+    invalidate_wishlists(wishlist.owner_id)
 
     if wishlist.is_public:
-        await manager.broadcast(
+        background_tasks.add_task(
+            manager.broadcast_debounced,
             f"friends:{wishlist.owner_id}",
             {
                 "type": "FRIEND_WISHLISTS_DIRTY",
@@ -75,30 +138,18 @@ def get_wishlist(
     db: Annotated[Session, Depends(get_db)],
     current_user: Annotated[User, Depends(get_current_user)],
 ) -> Wishlist:
-    wishlist = (
-        db.query(Wishlist)
-        .filter(Wishlist.id == wishlist_id, Wishlist.owner_id == current_user.id)
-        .first()
-    )
-    if not wishlist:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Wishlist not found")
-    return wishlist
+    return _get_owned_wishlist(db, wishlist_id, current_user)
 
 
 @router.patch("/{wishlist_id}", response_model=WishlistRead)
-async def update_wishlist(
+def update_wishlist(
     wishlist_id: int,
     payload: WishlistUpdate,
+    background_tasks: BackgroundTasks,
     db: Annotated[Session, Depends(get_db)],
     current_user: Annotated[User, Depends(get_current_user)],
 ) -> Wishlist:
-    wishlist = (
-        db.query(Wishlist)
-        .filter(Wishlist.id == wishlist_id, Wishlist.owner_id == current_user.id)
-        .first()
-    )
-    if not wishlist:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Wishlist not found")
+    wishlist = _get_owned_wishlist(db, wishlist_id, current_user)
 
     data = payload.model_dump(exclude_unset=True)
     for key, value in data.items():
@@ -106,10 +157,12 @@ async def update_wishlist(
 
     db.add(wishlist)
     db.commit()
-    db.refresh(wishlist)
+    invalidate_slug(wishlist.share_slug)
+    invalidate_wishlists(wishlist.owner_id)
 
     if wishlist.is_public:
-        await manager.broadcast(
+        background_tasks.add_task(
+            manager.broadcast_debounced,
             f"friends:{wishlist.owner_id}",
             {
                 "type": "FRIEND_WISHLISTS_DIRTY",
@@ -120,25 +173,24 @@ async def update_wishlist(
 
 
 @router.delete("/{wishlist_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_wishlist(
+def delete_wishlist(
     wishlist_id: int,
+    background_tasks: BackgroundTasks,
     db: Annotated[Session, Depends(get_db)],
     current_user: Annotated[User, Depends(get_current_user)],
 ) -> None:
-    wishlist = (
-        db.query(Wishlist)
-        .filter(Wishlist.id == wishlist_id, Wishlist.owner_id == current_user.id)
-        .first()
-    )
-    if not wishlist:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Wishlist not found")
+    wishlist = _get_owned_wishlist(db, wishlist_id, current_user)
     owner_id = wishlist.owner_id
     was_public = wishlist.is_public
+    share_slug = wishlist.share_slug
     db.delete(wishlist)
     db.commit()
+    invalidate_slug(share_slug)
+    invalidate_wishlists(owner_id)
 
     if was_public:
-        await manager.broadcast(
+        background_tasks.add_task(
+            manager.broadcast_debounced,
             f"friends:{owner_id}",
             {
                 "type": "FRIEND_WISHLISTS_DIRTY",
@@ -153,36 +205,24 @@ def list_items(
     wishlist_id: int,
     db: Annotated[Session, Depends(get_db)],
     current_user: Annotated[User, Depends(get_current_user)],
-) -> list[WishlistItem]:
-    wishlist = (
-        db.query(Wishlist)
-        .filter(Wishlist.id == wishlist_id, Wishlist.owner_id == current_user.id)
-        .first()
-    )
-    if not wishlist:
+) -> list[dict[str, Any]]:
+    owns_wishlist = db.execute(
+        select(exists().where(Wishlist.id == wishlist_id, Wishlist.owner_id == current_user.id))
+    ).scalar()
+    if not owns_wishlist:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Wishlist not found")
-    items = (
-        db.query(WishlistItem)
-        .filter(WishlistItem.wishlist_id == wishlist_id, WishlistItem.is_deleted.is_(False))
-        .all()
-    )
-    return items
+    return list_live_items(db, wishlist_id)
 
 
 @router.post("/{wishlist_id}/items", response_model=WishlistItemRead, status_code=status.HTTP_201_CREATED)
-async def create_item(
+def create_item(
     wishlist_id: int,
     payload: WishlistItemCreate,
+    background_tasks: BackgroundTasks,
     db: Annotated[Session, Depends(get_db)],
     current_user: Annotated[User, Depends(get_current_user)],
 ) -> WishlistItem:
-    wishlist = (
-        db.query(Wishlist)
-        .filter(Wishlist.id == wishlist_id, Wishlist.owner_id == current_user.id)
-        .first()
-    )
-    if not wishlist:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Wishlist not found")
+    wishlist = _get_owned_wishlist(db, wishlist_id, current_user)
 
     item = WishlistItem(
         wishlist_id=wishlist_id,
@@ -195,142 +235,112 @@ async def create_item(
     )
     db.add(item)
     db.commit()
-    db.refresh(item)
+    item = load_item_for_read(db, item.id)
 
     if wishlist.is_public:
-        await manager.broadcast(
+        background_tasks.add_task(
+            manager.broadcast,
             wishlist.share_slug,
-            {
-                "type": "ITEM_UPDATED",
-                "item": WishlistItemRead.model_validate(item).model_dump(),
-            },
+            item_updated_message(item),
         )
 
     return item
 
 
 @router.patch("/{wishlist_id}/items/{item_id}", response_model=WishlistItemRead)
-async def update_item(
+def update_item(
     wishlist_id: int,
     item_id: int,
     payload: WishlistItemUpdate,
+    background_tasks: BackgroundTasks,
     db: Annotated[Session, Depends(get_db)],
     current_user: Annotated[User, Depends(get_current_user)],
 ) -> WishlistItem:
-    wishlist = (
-        db.query(Wishlist)
-        .filter(Wishlist.id == wishlist_id, Wishlist.owner_id == current_user.id)
-        .first()
-    )
-    if not wishlist:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Wishlist not found")
-
-    item = (
-        db.query(WishlistItem)
-        .filter(WishlistItem.id == item_id, WishlistItem.wishlist_id == wishlist.id)
-        .first()
-    )
-    if not item or item.is_deleted:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Item not found")
-
     data = payload.model_dump(exclude_unset=True)
-    for key, value in data.items():
-        setattr(item, key, value)
-
-    db.add(item)
-    db.commit()
-    db.refresh(item)
+    if data:
+        _update_owned_item(db, wishlist_id, item_id, current_user, data)
+    else:
+        wishlist = _get_owned_wishlist(db, wishlist_id, current_user)
+        item = db.get(WishlistItem, item_id)
+        if item is None or item.wishlist_id != wishlist.id or item.is_deleted:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Item not found")
+    item = load_item_for_read(db, item_id)
+    wishlist = item.wishlist
 
     if wishlist.is_public:
-        await manager.broadcast(
+        background_tasks.add_task(
+            manager.broadcast,
             wishlist.share_slug,
-            {
-                "type": "ITEM_UPDATED",
-                "item": WishlistItemRead.model_validate(item).model_dump(),
-            },
+            item_updated_message(item),
         )
 
     return item
 
 
 @router.delete("/{wishlist_id}/items/{item_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_item(
+def delete_item(
     wishlist_id: int,
     item_id: int,
+    background_tasks: BackgroundTasks,
     db: Annotated[Session, Depends(get_db)],
     current_user: Annotated[User, Depends(get_current_user)],
 ) -> None:
-    wishlist = (
-        db.query(Wishlist)
-        .filter(Wishlist.id == wishlist_id, Wishlist.owner_id == current_user.id)
-        .first()
-    )
-    if not wishlist:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Wishlist not found")
-
-    item = (
-        db.query(WishlistItem)
-        .filter(WishlistItem.id == item_id, WishlistItem.wishlist_id == wishlist.id)
-        .first()
-    )
-    if not item or item.is_deleted:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Item not found")
-
-    item.is_deleted = True
-    db.add(item)
-    db.commit()
-    db.refresh(item)
+    _update_owned_item(db, wishlist_id, item_id, current_user, {"is_deleted": True})
+    item = load_item_for_read(db, item_id)
+    wishlist = item.wishlist
 
     if wishlist.is_public:
-        await manager.broadcast(
+        background_tasks.add_task(
+            manager.broadcast,
             wishlist.share_slug,
-            {
-                "type": "ITEM_UPDATED",
-                "item": WishlistItemRead.model_validate(item).model_dump(),
-            },
+            item_updated_message(item),
         )
 
     return None
 
 
-class _MetaParser(HTMLParser):
-    def __init__(self) -> None:
-        super().__init__()
-        self.by_property: dict[str, str] = {}
-        self.by_name: dict[str, str] = {}
-
-    def handle_starttag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
-        if tag.lower() != "meta":
-            return
-        data = {key.lower(): value for key, value in attrs if value is not None}
-        content = data.get("content")
+def _extract_meta(html: str) -> tuple[dict[str, str], dict[str, str]]:
+    by_property: dict[str, str] = {}
+    by_name: dict[str, str] = {}
+    for node in HTMLParser(html).css("meta"):
+        attrs = node.attributes
+        content = attrs.get("content")
         if not content:
-            return
-        prop = data.get("property")
+            continue
+        prop = attrs.get("property")
         if prop:
-            self.by_property[prop.lower()] = content
-        name = data.get("name")
+            by_property[prop.lower()] = content
+        name = attrs.get("name")
         if name:
-            self.by_name[name.lower()] = content
+            by_name[name.lower()] = content
+    return by_property, by_name
 
 
-def _fetch_product_preview(url: str) -> ProductPreviewResponse:
+_PREVIEW_MAX_BYTES = 200000
+_HEAD_END_RE = re.compile(rb"</head\s*>", re.IGNORECASE)
+# A closing tag split across chunks starts at most this many bytes before the new chunk.
+_HEAD_END_OVERLAP = 16
+
+
+async def _fetch_product_preview(client: httpx.AsyncClient, url: str) -> ProductPreviewResponse:
     try:
-        request = Request(
-            url,
-            headers={
-                "User-Agent": "Mozilla/5.0",
-            },
-        )
-        with urlopen(request, timeout=5) as response:
-            status_code = response.getcode()
-            if status_code and status_code >= 400:
+        async with client.stream("GET", url) as response:
+            if response.status_code >= 400:
                 return ProductPreviewResponse(is_available=False)
             content_type = response.headers.get("Content-Type", "")
             if "text/html" not in content_type:
                 return ProductPreviewResponse()
-            raw = response.read(200000)
-    except (HTTPError, URLError, ValueError):
+            # The tags we read live in <head>; stop downloading as soon as it is closed.
+            buffer = bytearray()
+            head_end = None
+            async for chunk in response.aiter_bytes():
+                scan_from = max(len(buffer) - _HEAD_END_OVERLAP, 0)
+                buffer += chunk
+                head_end = _HEAD_END_RE.search(buffer, scan_from)
+                if head_end or len(buffer) >= _PREVIEW_MAX_BYTES:
+                    break
+            raw = bytes(buffer[: head_end.start()] if head_end else buffer[:_PREVIEW_MAX_BYTES])
+    except (httpx.HTTPError, httpx.InvalidURL, ValueError):
         return ProductPreviewResponse(is_available=False)
 
     try:
@@ -338,22 +348,21 @@ def _fetch_product_preview(url: str) -> ProductPreviewResponse:
     except Exception:
         return ProductPreviewResponse()
 
-    parser = _MetaParser()
-    parser.feed(html)
+    by_property, by_name = _extract_meta(html)
 
-    title = parser.by_property.get("og:title") or parser.by_name.get("title")
-    description = parser.by_property.get("og:description") or parser.by_name.get("description")
-    image_url = parser.by_property.get("og:image")
+    title = by_property.get("og:title") or by_name.get("title")
+    description = by_property.get("og:description") or by_name.get("description")
+    image_url = by_property.get("og:image")
 
     price_str = (
-        parser.by_property.get("product:price:amount")
-        or parser.by_name.get("price")
-        or parser.by_property.get("og:price:amount")
+        by_property.get("product:price:amount")
+        or by_name.get("price")
+        or by_property.get("og:price:amount")
     )
     currency = (
-        parser.by_property.get("product:price:currency")
-        or parser.by_name.get("currency")
-        or parser.by_property.get("og:price:currency")
+        by_property.get("product:price:currency")
+        or by_name.get("currency")
+        or by_property.get("og:price:currency")
     )
 
     price: float | None = None
@@ -373,10 +382,11 @@ def _fetch_product_preview(url: str) -> ProductPreviewResponse:
 
 
 @router.post("/preview-url", response_model=ProductPreviewResponse)
-def preview_item_url(
+async def preview_item_url(
     payload: ProductPreviewRequest,
     db: Annotated[Session, Depends(get_db)],
     current_user: Annotated[User, Depends(get_current_user)],
+    http_client: Annotated[httpx.AsyncClient, Depends(get_http_client)],
 ) -> ProductPreviewResponse:
     if not payload.url:
         raise HTTPException(
@@ -384,15 +394,12 @@ def preview_item_url(
             detail="URL is required",
         )
     _ = db
-    preview = _fetch_product_preview(payload.url)
-    return preview
-
+    cached = await get_cached_preview(payload.url)
+    if cached is not None:
+        return ProductPreviewResponse.model_validate_json(cached)
 
-def _generate_share_slug(db: Session) -> str:
-    import secrets
+    preview = await _fetch_product_preview(http_client, payload.url)
+    if preview.is_available:
+        await cache_preview(payload.url, preview.model_dump_json())
+    return preview
 
-    while True:
-        slug = secrets.token_urlsafe(8)
-        exists = db.query(Wishlist).filter(Wishlist.share_slug == slug).first()
-        if not exists:
-            return slug
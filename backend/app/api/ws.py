@@ -1,8 +1,11 @@
 from typing import Annotated
 
 from fastapi import APIRouter, Depends, WebSocket
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import exists, select
 from sqlalchemy.orm import Session
 
+from app.core.slug_cache import get_public_wishlist_ids
 from app.db.session import get_db
 from app.models import Wishlist
 from app.realtime.manager import manager
@@ -11,14 +14,23 @@ from app.realtime.manager import manager
 router = APIRouter()
 
 
+def _is_public_slug(db: Session, share_slug: str) -> bool:
+    try:
+        return db.execute(
+            select(exists().where(Wishlist.share_slug == share_slug, Wishlist.is_public.is_(True)))
+        ).scalar()
+    finally:
+        # The socket may stay open for hours; do not hold a pooled connection for it.
+        db.close()
+
+
 @router.websocket("/ws/wishlists/{share_slug}")
 async def wishlist_ws(
     websocket: WebSocket,
     share_slug: str,
     db: Annotated[Session, Depends(get_db)],
 ) -> None:
-    wishlist = db.query(Wishlist).filter(Wishlist.share_slug == share_slug, Wishlist.is_public.is_(True)).first()
-    if not wishlist:
+    if get_public_wishlist_ids(share_slug) is None and not await run_in_threadpool(_is_public_slug, db, share_slug):
         await websocket.close()
         return
 
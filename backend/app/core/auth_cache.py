@@ -0,0 +1,50 @@
+import hashlib
+import threading
+import time
+
+from cachetools import TTLCache
+
+from app.core.config import settings
+
+
+_lock = threading.Lock()
+_tokens: TTLCache[bytes, tuple[int, float]] = TTLCache(
+    maxsize=settings.auth_cache_maxsize,
+    ttl=settings.auth_cache_ttl_seconds,
+)
+
+
+def _token_key(token: str) -> bytes:
+    return hashlib.sha256(token.encode("utf-8")).digest()
+
+
+def get_cached_user_id(token: str) -> int | None:
+    key = _token_key(token)
+    with _lock:
+        entry = _tokens.get(key)
+        if entry is None:
+            return None
+        user_id, expires_at = entry
+        if expires_at <= time.time():
+            _tokens.pop(key, None)
+            return None
+        return user_id
+
+
+def cache_user_id(token: str, user_id: int, token_expires_at: float) -> None:
+    expires_at = min(token_expires_at, time.time() + settings.auth_cache_ttl_seconds)
+    key = _token_key(token)
+    with _lock:
+        _tokens[key] = (user_id, expires_at)
+
+
+def invalidate_user(user_id: int) -> None:
+    """Drop the user's cached tokens so the next request re-checks the token's password claim.
+
+    A request that was already past that check may re-cache a revoked token, which then lives
+    at most ``auth_cache_ttl_seconds``.
+    """
+    with _lock:
+        stale = [key for key, (cached_user_id, _) in _tokens.items() if cached_user_id == user_id]
+        for key in stale:
+            _tokens.pop(key, None)
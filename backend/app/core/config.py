@@ -10,10 +10,35 @@ class Settings(BaseSettings):
     postgres_user: str = "wishlist"
     postgres_password: str = "wishlist"
     postgres_db: str = "wishlist"
+    db_pool_size: int = 20
+    db_max_overflow: int = 40
+    db_pool_recycle: int = 1800
+    db_pool_pre_ping: bool = True
 
     secret_key: str = "change-me"
     access_token_expire_minutes: int = 60
     jwt_algorithm: str = "HS256"
+    email_code_secret: str = "change-me"
+    email_code_ttl_minutes: int = 10
+    email_code_max_attempts: int = 5
+    email_code_resend_interval_seconds: int = 60
+    argon2_time_cost: int = 1
+    argon2_memory_cost_kib: int = 46 * 1024
+    argon2_parallelism: int = 1
+    auth_cache_ttl_seconds: int = 5
+    auth_cache_maxsize: int = 10000
+
+    slug_cache_ttl_seconds: int = 30
+    slug_cache_maxsize: int = 5000
+    ws_send_timeout_seconds: float = 2.0
+    ws_debounce_seconds: float = 0.15
+
+    redis_url: str | None = None
+    redis_socket_timeout_seconds: float = 0.25
+    preview_cache_ttl_seconds: int = 6 * 60 * 60
+    preview_cache_maxsize: int = 1000
+    wishlist_cache_ttl_seconds: int = 15
+    wishlist_cache_maxsize: int = 10000
 
     smtp_host: str | None = None
     smtp_port: int = 587
@@ -21,6 +46,8 @@ class Settings(BaseSettings):
     smtp_password: str | None = None
     smtp_from: str | None = None
     smtp_use_tls: bool = True
+    smtp_timeout_seconds: int = 10
+    smtp_idle_timeout_seconds: int = 60
 
     class Config:
         env_file = ".env"
@@ -28,7 +55,7 @@ class Settings(BaseSettings):
     @property
     def database_url(self) -> str:
         return (
-            f"postgresql+psycopg2://{self.postgres_user}:{self.postgres_password}"
+            f"postgresql+psycopg://{self.postgres_user}:{self.postgres_password}"
             f"@{self.postgres_host}:{self.postgres_port}/{self.postgres_db}"
         )
 
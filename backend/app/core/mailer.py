@@ -0,0 +1,80 @@
+import logging
+import smtplib
+import threading
+import time
+from email.message import EmailMessage
+
+from app.core.config import settings
+
+
+logger = logging.getLogger(__name__)
+
+
+class SMTPMailer:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._server: smtplib.SMTP | None = None
+        self._last_used_at = 0.0
+
+    def _connect(self) -> smtplib.SMTP:
+        server = smtplib.SMTP(settings.smtp_host, settings.smtp_port, timeout=settings.smtp_timeout_seconds)
+        if settings.smtp_use_tls:
+            server.starttls()
+        if settings.smtp_user and settings.smtp_password:
+            server.login(settings.smtp_user, settings.smtp_password)
+        return server
+
+    def _close(self) -> None:
+        if self._server is None:
+            return
+        try:
+            self._server.quit()
+        except (smtplib.SMTPException, OSError):
+            pass
+        self._server = None
+
+    def _get_server(self) -> smtplib.SMTP:
+        idle = time.monotonic() - self._last_used_at
+        if self._server is not None and idle > settings.smtp_idle_timeout_seconds:
+            self._close()
+        if self._server is not None:
+            # Detect a stale pooled connection before any message data is sent, so nothing is delivered twice.
+            try:
+                self._server.noop()
+            except (smtplib.SMTPException, OSError):
+                self._close()
+        if self._server is None:
+            self._server = self._connect()
+        return self._server
+
+    def send(self, message: EmailMessage) -> None:
+        with self._lock:
+            try:
+                self._get_server().send_message(message)
+                self._last_used_at = time.monotonic()
+            except Exception as exc:
+                self._close()
+                logger.error("Failed to send email to %s: %s", message["To"], exc)
+
+    def close(self) -> None:
+        with self._lock:
+            self._close()
+
+
+mailer = SMTPMailer()
+
+
+def send_email(to_email: str, subject: str, body: str) -> None:
+    if not settings.smtp_host or not settings.smtp_from:
+        logger.warning(
+            "SMTP is not configured; skipping email send to %s with subject %s",
+            to_email,
+            subject,
+        )
+        return
+    message = EmailMessage()
+    message["From"] = settings.smtp_from
+    message["To"] = to_email
+    message["Subject"] = subject
+    message.set_content(body)
+    mailer.send(message)
@@ -0,0 +1,62 @@
+import hashlib
+import logging
+import threading
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from cachetools import TTLCache
+from redis.exceptions import RedisError
+
+from app.core.config import settings
+from app.core.redis_client import redis_async as _redis
+
+
+logger = logging.getLogger(__name__)
+
+_KEY_PREFIX = "preview:"
+
+_lock = threading.Lock()
+_local: TTLCache[str, str] = TTLCache(
+    maxsize=settings.preview_cache_maxsize,
+    ttl=settings.preview_cache_ttl_seconds,
+)
+
+
+def canonicalize_url(url: str) -> str:
+    parts = urlsplit(url.strip())
+    query = [
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith("utm_")
+    ]
+    return urlunsplit(
+        (parts.scheme.lower(), parts.netloc.lower(), parts.path, urlencode(query), "")
+    )
+
+
+def _cache_key(url: str) -> str:
+    return _KEY_PREFIX + hashlib.sha1(canonicalize_url(url).encode("utf-8")).hexdigest()
+
+
+async def get_cached_preview(url: str) -> str | None:
+    key = _cache_key(url)
+    if _redis is None:
+        with _lock:
+            return _local.get(key)
+    try:
+        value = await _redis.get(key)
+    except RedisError:
+        logger.warning("Preview cache read failed", exc_info=True)
+        return None
+    return value.decode("utf-8") if value is not None else None
+
+
+async def cache_preview(url: str, value: str) -> None:
+    key = _cache_key(url)
+    if _redis is None:
+        with _lock:
+            _local[key] = value
+        return
+    try:
+        await _redis.set(key, value, ex=settings.preview_cache_ttl_seconds)
+    except RedisError:
+        logger.warning("Preview cache write failed", exc_info=True)
@@ -0,0 +1,22 @@
+from redis import Redis
+from redis.asyncio import Redis as AsyncRedis
+
+from app.core.config import settings
+
+
+# Short timeouts so an unreachable Redis degrades to a cache miss instead of stalling the request.
+_options = {
+    "socket_connect_timeout": settings.redis_socket_timeout_seconds,
+    "socket_timeout": settings.redis_socket_timeout_seconds,
+}
+
+# Sync handlers use redis_sync, async ones redis_async; both stay None when no REDIS_URL is configured.
+redis_sync: Redis | None = Redis.from_url(settings.redis_url, **_options) if settings.redis_url else None
+redis_async: AsyncRedis | None = AsyncRedis.from_url(settings.redis_url, **_options) if settings.redis_url else None
+
+
+async def close_redis() -> None:
+    if redis_async is not None:
+        await redis_async.aclose()
+    if redis_sync is not None:
+        redis_sync.close()
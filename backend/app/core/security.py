@@ -1,28 +1,70 @@
 from datetime import datetime, timedelta, timezone
+import hashlib
+import hmac
 
 import bcrypt
+from argon2 import PasswordHasher
+from argon2.exceptions import InvalidHashError, VerificationError
 from jose import JWTError, jwt
 
 from app.core.config import settings
 
 
+password_hasher = PasswordHasher(
+    time_cost=settings.argon2_time_cost,
+    memory_cost=settings.argon2_memory_cost_kib,
+    parallelism=settings.argon2_parallelism,
+)
+
+
+def _is_bcrypt_hash(hashed_password: str) -> bool:
+    return hashed_password.startswith("$2")
+
+
 def hash_password(password: str) -> str:
-    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
+    return password_hasher.hash(password)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return bcrypt.checkpw(plain_password.encode("utf-8"), hashed_password.encode("utf-8"))
+    if _is_bcrypt_hash(hashed_password):
+        return bcrypt.checkpw(plain_password.encode("utf-8"), hashed_password.encode("utf-8"))
+    try:
+        return password_hasher.verify(hashed_password, plain_password)
+    except (VerificationError, InvalidHashError):
+        return False
+
+
+# Verified against when the account does not exist, so unknown emails cost the same as wrong passwords.
+DUMMY_PASSWORD_HASH = hash_password("!invalid!")
+
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    if _is_bcrypt_hash(hashed_password):
+        return True
+    return password_hasher.check_needs_rehash(hashed_password)
+
+
+def hash_email_code(code: str) -> str:
+    return hmac.new(settings.email_code_secret.encode("utf-8"), code.encode("utf-8"), hashlib.sha256).hexdigest()
+
+
+def verify_email_code(code: str, code_hash: str) -> bool:
+    return hmac.compare_digest(hash_email_code(code), code_hash)
+
+
+def password_fingerprint(hashed_password: str) -> str:
+    # Embedded in access tokens; changing the password changes it and revokes every earlier token.
+    return hashlib.sha256(hashed_password.encode("utf-8")).hexdigest()[:16]
 
 
-def create_access_token(subject: str) -> str:
+def create_access_token(subject: str, hashed_password: str) -> str:
     expire = datetime.now(timezone.utc) + timedelta(minutes=settings.access_token_expire_minutes)
-    to_encode = {"sub": subject, "exp": expire}
+    to_encode = {"sub": subject, "exp": expire, "pwd": password_fingerprint(hashed_password)}
     return jwt.encode(to_encode, settings.secret_key, algorithm=settings.jwt_algorithm)
 
 
-def decode_access_token(token: str) -> str | None:
+def decode_access_token_payload(token: str) -> dict | None:
     try:
-        payload = jwt.decode(token, settings.secret_key, algorithms=[settings.jwt_algorithm])
-        return str(payload.get("sub"))
+        return jwt.decode(token, settings.secret_key, algorithms=[settings.jwt_algorithm])
     except JWTError:
         return None
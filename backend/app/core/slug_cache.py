@@ -0,0 +1,27 @@
+import threading
+
+from cachetools import TTLCache
+
+from app.core.config import settings
+
+
+_lock = threading.Lock()
+_public_wishlists: TTLCache[str, tuple[int, int]] = TTLCache(
+    maxsize=settings.slug_cache_maxsize,
+    ttl=settings.slug_cache_ttl_seconds,
+)
+
+
+def get_public_wishlist_ids(share_slug: str) -> tuple[int, int] | None:
+    with _lock:
+        return _public_wishlists.get(share_slug)
+
+
+def cache_public_wishlist_ids(share_slug: str, wishlist_id: int, owner_id: int) -> None:
+    with _lock:
+        _public_wishlists[share_slug] = (wishlist_id, owner_id)
+
+
+def invalidate_slug(share_slug: str) -> None:
+    with _lock:
+        _public_wishlists.pop(share_slug, None)
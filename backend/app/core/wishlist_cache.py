@@ -0,0 +1,54 @@
+import logging
+import threading
+
+from cachetools import TTLCache
+from redis.exceptions import RedisError
+
+from app.core.config import settings
+from app.core.redis_client import redis_sync as _redis
+
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_local: TTLCache[int, bytes] = TTLCache(
+    maxsize=settings.wishlist_cache_maxsize,
+    ttl=settings.wishlist_cache_ttl_seconds,
+)
+
+
+def _cache_key(user_id: int) -> str:
+    return f"wishlists:list:{user_id}"
+
+
+def get_cached_wishlists(user_id: int) -> bytes | None:
+    if _redis is None:
+        with _lock:
+            return _local.get(user_id)
+    try:
+        return _redis.get(_cache_key(user_id))
+    except RedisError:
+        logger.warning("Wishlist cache read failed", exc_info=True)
+        return None
+
+
+def cache_wishlists(user_id: int, payload: bytes) -> None:
+    if _redis is None:
+        with _lock:
+            _local[user_id] = payload
+        return
+    try:
+        _redis.set(_cache_key(user_id), payload, ex=settings.wishlist_cache_ttl_seconds)
+    except RedisError:
+        logger.warning("Wishlist cache write failed", exc_info=True)
+
+
+def invalidate_wishlists(user_id: int) -> None:
+    if _redis is None:
+        with _lock:
+            _local.pop(user_id, None)
+        return
+    try:
+        _redis.delete(_cache_key(user_id))
+    except RedisError:
+        logger.warning("Wishlist cache invalidation failed", exc_info=True)
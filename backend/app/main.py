@@ -1,17 +1,43 @@
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
+import httpx
 from fastapi import FastAPI
+from fastapi.dependencies.models import Dependant
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.openapi.utils import get_openapi
+from fastapi.responses import ORJSONResponse
+from fastapi.routing import APIRoute
 
 from app.core.config import settings
+from app.core.mailer import mailer
+from app.core.redis_client import close_redis
 from app.api import ws as ws_router
+from app.api.deps import get_current_user
 from app.api.v1 import auth as auth_router
 from app.api.v1 import friends as friends_router
 from app.api.v1 import public_wishlists as public_wishlists_router
 from app.api.v1 import wishlists as wishlists_router
-from app.db.base import Base
 from app.db.session import engine
 
 
-app = FastAPI(title=settings.project_name)
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    async with httpx.AsyncClient(
+        http2=True,
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+        headers={"User-Agent": "Mozilla/5.0"},
+        timeout=5.0,
+        follow_redirects=True,
+    ) as http_client:
+        app.state.http_client = http_client
+        yield
+    await close_redis()
+    mailer.close()
+    engine.dispose()
+
+
+app = FastAPI(title=settings.project_name, default_response_class=ORJSONResponse, lifespan=lifespan)
 
 
 app.add_middleware(
@@ -23,11 +49,6 @@ app.add_middleware(
 )
 
 
-@app.on_event("startup")
-def on_startup() -> None:
-    Base.metadata.create_all(bind=engine)
-
-
 @app.get("/health", tags=["health"])
 async def healthcheck() -> dict[str, str]:
     return {"status": "ok"}
@@ -38,3 +59,31 @@ app.include_router(auth_router.router, prefix="/api/v1")
 app.include_router(wishlists_router.router, prefix="/api/v1")
 app.include_router(friends_router.router, prefix="/api/v1")
 app.include_router(public_wishlists_router.router, prefix="/api/v1")
+
+
+def _requires_user(dependant: Dependant) -> bool:
+    return any(dep.call is get_current_user or _requires_user(dep) for dep in dependant.dependencies)
+
+
+def custom_openapi() -> dict:
+    """Declare bearer auth in the schema; get_current_user reads the header itself, without a security dependency."""
+    if app.openapi_schema:
+        return app.openapi_schema
+    schema = get_openapi(title=app.title, version=app.version, routes=app.routes)
+    schema.setdefault("components", {}).setdefault("securitySchemes", {})["bearerAuth"] = {
+        "type": "http",
+        "scheme": "bearer",
+        "bearerFormat": "JWT",
+    }
+    for route in app.routes:
+        if not isinstance(route, APIRoute) or not route.include_in_schema:
+            continue
+        if not _requires_user(route.dependant):
+            continue
+        for method in route.methods:
+            schema["paths"][route.path_format][method.lower()]["security"] = [{"bearerAuth": []}]
+    app.openapi_schema = schema
+    return schema
+
+
+app.openapi = custom_openapi
@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import String, Boolean, func
+from sqlalchemy import Index, String, Boolean, func, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db.base import Base
@@ -18,14 +18,27 @@ class User(Base):
 
     wishlists: Mapped[list["Wishlist"]] = relationship(back_populates="owner")
 
+    __mapper_args__ = {"eager_defaults": True}
+
 
 class EmailCode(Base):
     __tablename__ = "email_codes"
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
-    email: Mapped[str] = mapped_column(String(255), index=True)
-    purpose: Mapped[str] = mapped_column(String(32), index=True)
+    email: Mapped[str] = mapped_column(String(255))
+    purpose: Mapped[str] = mapped_column(String(32))
     code_hash: Mapped[str] = mapped_column(String(255))
-    is_used: Mapped[bool] = mapped_column(default=False, index=True)
+    is_used: Mapped[bool] = mapped_column(default=False)
+    attempts: Mapped[int] = mapped_column(default=0, server_default="0")
     created_at: Mapped[datetime] = mapped_column(server_default=func.now())
     expires_at: Mapped[datetime]
+
+    __table_args__ = (
+        Index(
+            "ix_emailcode_lookup",
+            "email",
+            "purpose",
+            "expires_at",
+            postgresql_where=text("is_used IS false"),
+        ),
+    )
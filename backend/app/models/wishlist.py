@@ -1,6 +1,6 @@
 from datetime import date, datetime
 
-from sqlalchemy import Boolean, DateTime, ForeignKey, Numeric, String, Text, UniqueConstraint, func
+from sqlalchemy import Boolean, DateTime, ForeignKey, Index, Numeric, String, Text, UniqueConstraint, func, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db.base import Base
@@ -25,12 +25,14 @@ class Wishlist(Base):
     owner: Mapped["User"] = relationship(back_populates="wishlists")
     items: Mapped[list["WishlistItem"]] = relationship(back_populates="wishlist", cascade="all, delete-orphan")
 
+    __mapper_args__ = {"eager_defaults": True}
+
 
 class WishlistItem(Base):
     __tablename__ = "wishlist_items"
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
-    wishlist_id: Mapped[int] = mapped_column(ForeignKey("wishlists.id"), index=True)
+    wishlist_id: Mapped[int] = mapped_column(ForeignKey("wishlists.id"))
     title: Mapped[str] = mapped_column(String(255))
     description: Mapped[str | None] = mapped_column(Text, nullable=True)
     url: Mapped[str | None] = mapped_column(String(1024), nullable=True)
@@ -54,7 +56,12 @@ class WishlistItem(Base):
         cascade="all, delete-orphan",
     )
 
-    __table_args__ = (UniqueConstraint("wishlist_id", "id", name="uq_wishlist_item_per_wishlist"),)
+    __table_args__ = (
+        UniqueConstraint("wishlist_id", "id", name="uq_wishlist_item_per_wishlist"),
+        # Only live items are ever listed; lookups by wishlist_id alone use the unique constraint above.
+        Index("ix_wishitem_list_live", "wishlist_id", postgresql_where=text("is_deleted IS false")),
+    )
+    __mapper_args__ = {"eager_defaults": True}
 
     @property
     def is_reserved(self) -> bool:
@@ -1,39 +1,73 @@
+import asyncio
+import contextlib
 from collections import defaultdict
 from typing import Any
 
+import orjson
 from fastapi import WebSocket
-from starlette.websockets import WebSocketDisconnect
+
+from app.core.config import settings
 
 
 class ConnectionManager:
     def __init__(self) -> None:
-        self.connections: dict[str, list[WebSocket]] = defaultdict(list)
+        self.connections: dict[str, set[WebSocket]] = defaultdict(set)
+        self._debounced: dict[str, asyncio.TimerHandle] = {}
+        self._flush_tasks: set[asyncio.Task[None]] = set()
 
     async def connect(self, slug: str, websocket: WebSocket) -> None:
         await websocket.accept()
-        self.connections[slug].append(websocket)
+        self.connections[slug].add(websocket)
 
     def disconnect(self, slug: str, websocket: WebSocket) -> None:
-        if slug not in self.connections:
+        connections = self.connections.get(slug)
+        if connections is None:
             return
-        if websocket in self.connections[slug]:
-            self.connections[slug].remove(websocket)
-        if not self.connections[slug]:
+        connections.discard(websocket)
+        if not connections:
             del self.connections[slug]
 
-    async def broadcast(self, slug: str, message: dict[str, Any]) -> None:
+    async def _send(self, websocket: WebSocket, text: str) -> None:
+        await asyncio.wait_for(websocket.send_text(text), timeout=settings.ws_send_timeout_seconds)
+
+    async def _close(self, websocket: WebSocket) -> None:
+        # The peer may already be gone; closing is only a hint for a live but slow client to reconnect.
+        with contextlib.suppress(Exception):
+            await asyncio.wait_for(websocket.close(), timeout=settings.ws_send_timeout_seconds)
+
+    async def broadcast(self, slug: str, message: dict[str, Any] | str | bytes) -> None:
         if slug not in self.connections:
             return
-        dead: list[WebSocket] = []
-        for connection in list(self.connections[slug]):
-            try:
-                await connection.send_json(message)
-            except WebSocketDisconnect:
-                dead.append(connection)
-            except Exception:
-                dead.append(connection)
-        for connection in dead:
-            self.disconnect(slug, connection)
+        connections = tuple(self.connections[slug])
+        if isinstance(message, dict):
+            message = orjson.dumps(message)
+        text = message.decode() if isinstance(message, bytes) else message
+        results = await asyncio.gather(
+            *(self._send(connection, text) for connection in connections),
+            return_exceptions=True,
+        )
+        dead = {connection for connection, result in zip(connections, results) if isinstance(result, BaseException)}
+        if not dead:
+            return
+        if slug in self.connections:
+            self.connections[slug].difference_update(dead)
+            if not self.connections[slug]:
+                del self.connections[slug]
+        await asyncio.gather(*(self._close(connection) for connection in dead))
+
+    async def broadcast_debounced(self, slug: str, message: dict[str, Any] | str | bytes) -> None:
+        """Broadcast once the slug has been quiet for the debounce window; a burst sends only the last message."""
+        pending = self._debounced.pop(slug, None)
+        if pending is not None:
+            pending.cancel()
+        loop = asyncio.get_running_loop()
+        self._debounced[slug] = loop.call_later(settings.ws_debounce_seconds, self._flush, slug, message)
+
+    def _flush(self, slug: str, message: dict[str, Any] | str | bytes) -> None:
+        self._debounced.pop(slug, None)
+        task = asyncio.ensure_future(self.broadcast(slug, message))
+        self._flush_tasks.add(task)
+        task.add_done_callback(self._flush_tasks.discard)
 
 
 manager = ConnectionManager()
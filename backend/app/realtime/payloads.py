@@ -0,0 +1,45 @@
+from typing import Any
+
+import orjson
+
+from app.models import WishlistItem
+
+
+def item_payload(item: WishlistItem) -> dict[str, Any]:
+    """JSON-ready view of an item with the same fields as WishlistItemRead."""
+    return {
+        "id": item.id,
+        "wishlist_id": item.wishlist_id,
+        "title": item.title,
+        "description": item.description,
+        "url": item.url,
+        "image_url": item.image_url,
+        "price": float(item.price) if item.price is not None else None,
+        "currency": item.currency,
+        "is_deleted": item.is_deleted,
+        "created_at": item.created_at.isoformat(),
+        "updated_at": item.updated_at.isoformat(),
+        "is_reserved": item.is_reserved,
+        "collected_amount": item.collected_amount,
+        "contributions_count": item.contributions_count,
+        "total_amount_target": item.total_amount_target,
+    }
+
+
+def item_row_payload(row: dict[str, Any]) -> dict[str, Any]:
+    """JSON-ready view of an item_queries row, matching item_payload."""
+    return {
+        **row,
+        "price": float(row["price"]) if row["price"] is not None else None,
+        "created_at": row["created_at"].isoformat(),
+        "updated_at": row["updated_at"].isoformat(),
+    }
+
+
+def item_row_updated_message(row: dict[str, Any]) -> bytes:
+    return orjson.dumps({"type": "ITEM_UPDATED", "item": item_row_payload(row)})
+
+
+def item_updated_message(item: WishlistItem) -> bytes:
+    """ITEM_UPDATED frame, encoded once so the broadcast can send it as is."""
+    return orjson.dumps({"type": "ITEM_UPDATED", "item": item_payload(item)})
@@ -11,3 +11,6 @@ class FriendRead(BaseModel):
     friend_email: EmailStr
     friend_name: str | None
 
+    class Config:
+        from_attributes = True
+
@@ -0,0 +1,183 @@
+from collections.abc import Callable, Generator
+from functools import lru_cache
+from types import SimpleNamespace
+from typing import Any
+import os
+
+import orjson
+import pytest
+
+
+# Read by app.core.config when the app is first imported; the minimum Argon2 cost keeps
+# register/login from dominating the suite.
+os.environ.setdefault("ARGON2_TIME_COST", "1")
+os.environ.setdefault("ARGON2_MEMORY_COST_KIB", "8")
+os.environ.setdefault("ARGON2_PARALLELISM", "1")
+
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import Engine, create_engine, event  # noqa: E402
+from sqlalchemy.orm import Session, sessionmaker  # noqa: E402
+from sqlalchemy.pool import StaticPool  # noqa: E402
+
+from app.api.deps import get_db as app_get_db  # noqa: E402
+from app.core import auth_cache, slug_cache, wishlist_cache  # noqa: E402
+from app.db.base import Base  # noqa: E402
+from app.main import app  # noqa: E402
+
+
+class OrjsonTestClient(TestClient):
+    """TestClient that encodes ``json=`` request bodies with orjson instead of the stdlib."""
+
+    def request(self, method: str, url: Any, *, json: Any = None, headers: Any = None, **kwargs: Any):
+        if json is not None:
+            headers = {**(headers or {}), "Content-Type": "application/json"}
+            # default=dict lets read-only MappingProxyType bodies through.
+            kwargs["content"] = orjson.dumps(json, default=dict)
+        return super().request(method, url, headers=headers, **kwargs)
+
+
+def login_headers(client: TestClient, email: str, password: str) -> dict[str, str]:
+    response = client.post("/api/v1/auth/login", data={"username": email, "password": password})
+    assert response.status_code == 200
+    return {"Authorization": "Bearer " + orjson.loads(response.content)["access_token"]}
+
+
+@pytest.fixture(scope="session")
+def worker_id(request: pytest.FixtureRequest) -> str:
+    """Same value as pytest-xdist's fixture, but also available when running without ``-n``."""
+    workerinput = getattr(request.config, "workerinput", None)
+    return workerinput["workerid"] if workerinput else "master"
+
+
+@pytest.fixture(scope="session")
+def engine(worker_id: str) -> Generator[Engine, None, None]:
+    # One named in-memory database per xdist worker; StaticPool keeps it alive on a single connection.
+    test_engine = create_engine(
+        f"sqlite:///file:wishlist_{worker_id}?mode=memory&cache=shared&uri=true",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+
+    # pysqlite manages transactions itself and breaks SAVEPOINT; let SQLAlchemy emit BEGIN.
+    @event.listens_for(test_engine, "connect")
+    def _disable_pysqlite_transactions(dbapi_connection, connection_record) -> None:
+        dbapi_connection.isolation_level = None
+
+    # Durability is irrelevant for a throwaway database.
+    @event.listens_for(test_engine, "connect")
+    def _tune_sqlite(dbapi_connection, connection_record) -> None:
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA synchronous=OFF")
+        cursor.execute("PRAGMA journal_mode=MEMORY")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.close()
+
+    @event.listens_for(test_engine, "begin")
+    def _emit_begin(connection) -> None:
+        connection.exec_driver_sql("BEGIN")
+
+    yield test_engine
+    test_engine.dispose()
+
+
+@pytest.fixture(scope="session")
+def session_factory(engine: Engine) -> sessionmaker[Session]:
+    return sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
+
+
+@pytest.fixture(scope="session", autouse=True)
+def schema(engine: Engine) -> Generator[None, None, None]:
+    Base.metadata.create_all(bind=engine)
+    yield
+    Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture(autouse=True)
+def db_session(
+    engine: Engine, session_factory: sessionmaker[Session], schema: None
+) -> Generator[Session, None, None]:
+    connection = engine.connect()
+    transaction = connection.begin()
+    # Commits inside the app release a SAVEPOINT; the outer transaction is rolled back after the test.
+    session = session_factory(bind=connection, join_transaction_mode="create_savepoint")
+
+    def override_get_db() -> Generator[Session, None, None]:
+        yield session
+
+    app.dependency_overrides[app_get_db] = override_get_db
+    yield session
+    app.dependency_overrides.pop(app_get_db, None)
+    session.close()
+    transaction.rollback()
+    connection.close()
+
+
+@pytest.fixture(autouse=True)
+def reset_caches() -> None:
+    # Rolled-back ids are handed out again, so entries cached by an earlier test would leak into this one.
+    with auth_cache._lock:
+        auth_cache._tokens.clear()
+    with slug_cache._lock:
+        slug_cache._public_wishlists.clear()
+    with wishlist_cache._lock:
+        wishlist_cache._local.clear()
+
+
+@pytest.fixture(scope="session")
+def client() -> Generator[TestClient, None, None]:
+    with OrjsonTestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def auth_headers(client: TestClient) -> Callable[[str, str], dict[str, str]]:
+    """Log in and build the Authorization header, memoized for the current test only.
+
+    Accounts registered inside a test are rolled back afterwards, so the cache must not outlive it.
+    """
+
+    @lru_cache(maxsize=64)
+    def auth(email: str, password: str) -> dict[str, str]:
+        return login_headers(client, email, password)
+
+    return auth
+
+
+@pytest.fixture(scope="session")
+def authed_factory(
+    client: TestClient, session_factory: sessionmaker[Session], schema: None
+) -> Callable[[str], SimpleNamespace]:
+    """Register and log in a user once per run; only usable from session-scoped fixtures."""
+    users: dict[str, SimpleNamespace] = {}
+
+    def committed_get_db() -> Generator[Session, None, None]:
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    def authed(email: str) -> SimpleNamespace:
+        if email in users:
+            return users[email]
+        # Committed outside the per-test transaction, so the account survives every rollback.
+        app.dependency_overrides[app_get_db] = committed_get_db
+        try:
+            register_response = client.post(
+                "/api/v1/auth/register",
+                json={"email": email, "password": "password123", "name": email.split("@")[0]},
+            )
+            assert register_response.status_code == 201
+            headers = login_headers(client, email, "password123")
+        finally:
+            app.dependency_overrides.pop(app_get_db, None)
+        user_id = orjson.loads(register_response.content)["id"]
+        users[email] = SimpleNamespace(client=client, headers=headers, email=email, user_id=user_id)
+        return users[email]
+
+    return authed
+
+
+@pytest.fixture(scope="session")
+def authed(authed_factory: Callable[[str], SimpleNamespace]) -> SimpleNamespace:
+    return authed_factory("owner@example.com")
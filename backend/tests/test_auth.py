@@ -0,0 +1,116 @@
+from collections.abc import Callable
+
+import bcrypt
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.api.v1 import auth as auth_api
+from app.core.config import settings
+from app.models import EmailCode, User
+
+
+FIXED_CODE = "1234"
+
+
+@pytest.fixture
+def fixed_code(monkeypatch: pytest.MonkeyPatch) -> str:
+    monkeypatch.setattr(auth_api, "_generate_code", lambda: FIXED_CODE)
+    return FIXED_CODE
+
+
+@pytest.fixture
+def sent_emails(monkeypatch: pytest.MonkeyPatch) -> list[tuple[str, str, str]]:
+    sent: list[tuple[str, str, str]] = []
+    monkeypatch.setattr(auth_api, "send_email", lambda *args: sent.append(args))
+    return sent
+
+
+@pytest.fixture
+def registered_user(client: TestClient) -> str:
+    response = client.post(
+        "/api/v1/auth/register",
+        json={"email": "reset@example.com", "password": "password123", "name": "Reset User"},
+    )
+    assert response.status_code == 201
+    return "reset@example.com"
+
+
+def test_password_reset_revokes_earlier_tokens(
+    client: TestClient,
+    auth_headers: Callable[[str, str], dict[str, str]],
+    registered_user: str,
+    fixed_code: str,
+) -> None:
+    headers = auth_headers(registered_user, "password123")
+    assert client.get("/api/v1/auth/me", headers=headers).status_code == 200
+
+    request_response = client.post("/api/v1/auth/request-password-reset", json={"email": registered_user})
+    assert request_response.status_code == 200
+    confirm_response = client.post(
+        "/api/v1/auth/confirm-password-reset",
+        json={"email": registered_user, "code": fixed_code, "new_password": "new-password456"},
+    )
+    assert confirm_response.status_code == 204
+
+    assert client.get("/api/v1/auth/me", headers=headers).status_code == 401
+    new_headers = auth_headers(registered_user, "new-password456")
+    assert client.get("/api/v1/auth/me", headers=new_headers).status_code == 200
+
+
+def test_login_code_is_stored_as_hmac_and_accepted(
+    client: TestClient, db_session: Session, registered_user: str, fixed_code: str
+) -> None:
+    assert client.post("/api/v1/auth/request-login-code", json={"email": registered_user}).status_code == 200
+
+    code_hash = db_session.scalars(select(EmailCode.code_hash).where(EmailCode.email == registered_user)).one()
+    assert code_hash != fixed_code
+
+    response = client.post("/api/v1/auth/login-with-code", json={"email": registered_user, "code": fixed_code})
+    assert response.status_code == 200
+    assert response.json()["access_token"]
+
+
+def test_login_code_rejected_after_max_attempts(
+    client: TestClient, registered_user: str, fixed_code: str
+) -> None:
+    assert client.post("/api/v1/auth/request-login-code", json={"email": registered_user}).status_code == 200
+
+    for _ in range(settings.email_code_max_attempts):
+        response = client.post("/api/v1/auth/login-with-code", json={"email": registered_user, "code": "0000"})
+        assert response.status_code == 401
+
+    response = client.post("/api/v1/auth/login-with-code", json={"email": registered_user, "code": fixed_code})
+    assert response.status_code == 401
+
+
+def test_second_code_request_within_interval_sends_nothing(
+    client: TestClient,
+    db_session: Session,
+    registered_user: str,
+    sent_emails: list[tuple[str, str, str]],
+) -> None:
+    for _ in range(2):
+        response = client.post("/api/v1/auth/request-login-code", json={"email": registered_user})
+        assert response.status_code == 200
+        assert response.json() == {"ok": True}
+
+    assert len(sent_emails) == 1
+    codes = db_session.scalars(select(EmailCode).where(EmailCode.email == registered_user)).all()
+    assert len(codes) == 1
+
+
+def test_login_rehashes_bcrypt_password_to_argon2(client: TestClient, db_session: Session) -> None:
+    legacy_hash = bcrypt.hashpw(b"password123", bcrypt.gensalt(rounds=4)).decode("utf-8")
+    user = User(email="legacy@example.com", hashed_password=legacy_hash, name="Legacy User")
+    db_session.add(user)
+    db_session.commit()
+
+    response = client.post("/api/v1/auth/login", data={"username": "legacy@example.com", "password": "password123"})
+    assert response.status_code == 200
+
+    db_session.refresh(user)
+    assert user.hashed_password.startswith("$argon2")
+    response = client.post("/api/v1/auth/login", data={"username": "legacy@example.com", "password": "password123"})
+    assert response.status_code == 200
@@ -1,287 +1,291 @@
-from collections.abc import Generator
-
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+from types import MappingProxyType, SimpleNamespace
+from typing import Any
+import secrets
+import threading
+import time
+
+import orjson
+import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
-from sqlalchemy.orm import Session, sessionmaker
+from starlette.testclient import WebSocketTestSession
+from sqlalchemy import Engine, event
+from sqlalchemy.orm import Session
 
-from app.api.deps import get_db as app_get_db
-from app.db.base import Base
-from app.main import app
+from app.core.security import create_access_token
+from app.models import User, Wishlist, WishlistItem
 
 
-engine = create_engine("sqlite:///:memory:")
-TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Read-only so a test cannot mutate a body another test relies on.
+REGISTER_BODY = MappingProxyType({"email": "user@example.com", "password": "password123", "name": "Test User"})
+FRIEND_REGISTER_BODY = MappingProxyType(
+    {"email": "friend@example.com", "password": "password123", "name": "Friend User"}
+)
+CAMERA_ITEM_BODY = MappingProxyType(
+    {"title": "Camera", "description": None, "url": None, "image_url": None, "price": 1000.0, "currency": "RUB"}
+)
+SECOND_ITEM_BODY = MappingProxyType(
+    {"title": "Second", "description": None, "url": None, "image_url": None, "price": None, "currency": None}
+)
 
 
-def override_get_db() -> Generator[Session, None, None]:
-    db = TestingSessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+def _request_ok(client: TestClient, method: str, url: str, status: int, **kwargs: Any) -> Any:
+    response = client.request(method, url, **kwargs)
+    assert response.status_code == status, response.text
+    return orjson.loads(response.content) if response.content else None
 
 
-Base.metadata.create_all(bind=engine)
-app.dependency_overrides[app_get_db] = override_get_db
-client = TestClient(app)
+def get_ok(client: TestClient, url: str, *, status: int = 200, **kwargs: Any) -> Any:
+    return _request_ok(client, "GET", url, status, **kwargs)
 
 
-def test_full_wishlist_flow() -> None:
-    register_response = client.post(
-        "/api/v1/auth/register",
-        json={
-            "email": "user@example.com",
-            "password": "password123",
-            "name": "Test User",
-        },
+def post_ok(client: TestClient, url: str, *, status: int = 201, **kwargs: Any) -> Any:
+    return _request_ok(client, "POST", url, status, **kwargs)
+
+
+def delete_ok(client: TestClient, url: str, *, status: int = 204, **kwargs: Any) -> Any:
+    return _request_ok(client, "DELETE", url, status, **kwargs)
+
+
+@pytest.fixture
+def owner_headers(authed: SimpleNamespace) -> dict[str, str]:
+    return authed.headers
+
+
+@pytest.fixture
+def public_wishlist(client: TestClient, owner_headers: dict[str, str]) -> dict[str, Any]:
+    return post_ok(
+        client,
+        "/api/v1/wishlists/",
+        json={"title": "Birthday", "description": "Party gifts", "is_public": True},
+        headers=owner_headers,
     )
-    assert register_response.status_code == 201
 
-    login_response = client.post(
-        "/api/v1/auth/login",
-        data={"username": "user@example.com", "password": "password123"},
+
+@pytest.fixture
+def item_in_wishlist(
+    client: TestClient, owner_headers: dict[str, str], public_wishlist: dict[str, Any]
+) -> dict[str, Any]:
+    return post_ok(
+        client, f"/api/v1/wishlists/{public_wishlist['id']}/items", json=CAMERA_ITEM_BODY, headers=owner_headers
     )
-    assert login_response.status_code == 200
-    login_data = login_response.json()
-    token = login_data["access_token"]
-    headers = {"Authorization": f"Bearer {token}"}
-
-    me_response = client.get("/api/v1/auth/me", headers=headers)
-    assert me_response.status_code == 200
-    me = me_response.json()
+
+
+def test_register_login_and_read_profile(
+    client: TestClient, auth_headers: Callable[[str, str], dict[str, str]]
+) -> None:
+    post_ok(client, "/api/v1/auth/register", json=REGISTER_BODY)
+    headers = auth_headers("user@example.com", "password123")
+
+    me = get_ok(client, "/api/v1/auth/me", headers=headers)
     assert me["email"] == "user@example.com"
     assert me["name"] == "Test User"
 
-    friend_register_response = client.post(
-        "/api/v1/auth/register",
-        json={
-            "email": "friend@example.com",
-            "password": "password123",
-            "name": "Friend User",
-        },
-    )
-    assert friend_register_response.status_code == 201
 
-    add_friend_response = client.post(
-        "/api/v1/friends/",
-        json={"email": "friend@example.com"},
-        headers=headers,
+def test_add_friend_by_email(client: TestClient, owner_headers: dict[str, str]) -> None:
+    post_ok(client, "/api/v1/auth/register", json=FRIEND_REGISTER_BODY)
+
+    friend_payload = post_ok(
+        client, "/api/v1/friends/", json={"email": "friend@example.com"}, headers=owner_headers
     )
-    assert add_friend_response.status_code == 201
-    friend_payload = add_friend_response.json()
     assert friend_payload["friend_email"] == "friend@example.com"
 
-    wishlist_response = client.post(
-        "/api/v1/wishlists/",
-        json={"title": "Birthday", "description": "Party gifts", "is_public": True},
-        headers=headers,
-    )
-    assert wishlist_response.status_code == 201
-    wishlist = wishlist_response.json()
-    wishlist_id = wishlist["id"]
-
-    item_response = client.post(
-        f"/api/v1/wishlists/{wishlist_id}/items",
-        json={
-            "title": "Camera",
-            "description": None,
-            "url": None,
-            "image_url": None,
-            "price": 1000.0,
-            "currency": "RUB",
-        },
-        headers=headers,
-    )
-    assert item_response.status_code == 201
-    item = item_response.json()
-    item_id = item["id"]
 
-    public_wishlist_response = client.get(
-        f"/api/v1/public/wishlists/{wishlist['share_slug']}",
-    )
-    assert public_wishlist_response.status_code == 200
+def test_public_wishlist_exposes_items(
+    client: TestClient, public_wishlist: dict[str, Any], item_in_wishlist: dict[str, Any]
+) -> None:
+    get_ok(client, f"/api/v1/public/wishlists/{public_wishlist['share_slug']}")
 
-    public_items_response = client.get(
-        f"/api/v1/public/wishlists/{wishlist['share_slug']}/items",
-    )
-    assert public_items_response.status_code == 200
-    public_items = public_items_response.json()
+    public_items = get_ok(client, f"/api/v1/public/wishlists/{public_wishlist['share_slug']}/items")
     assert len(public_items) == 1
-
-    reserve_response = client.post(
-        f"/api/v1/public/wishlists/{wishlist['share_slug']}/items/{item_id}/reserve",
+    assert public_items[0]["id"] == item_in_wishlist["id"]
+
+
+def test_reservation_is_visible_to_owner(
+    client: TestClient,
+    owner_headers: dict[str, str],
+    public_wishlist: dict[str, Any],
+    item_in_wishlist: dict[str, Any],
+) -> None:
+    post_ok(
+        client,
+        f"/api/v1/public/wishlists/{public_wishlist['share_slug']}/items/{item_in_wishlist['id']}/reserve",
         json={"display_name": "Friend", "contact": "friend@example.com"},
     )
-    assert reserve_response.status_code == 201
 
-    contribution_response = client.post(
-        f"/api/v1/public/wishlists/{wishlist['share_slug']}/items/{item_id}/contributions",
+    owner_items = get_ok(client, f"/api/v1/wishlists/{public_wishlist['id']}/items", headers=owner_headers)
+    assert len(owner_items) == 1
+    assert owner_items[0]["is_reserved"] is True
+
+
+def test_contribution_is_totalled_for_owner(
+    client: TestClient,
+    owner_headers: dict[str, str],
+    public_wishlist: dict[str, Any],
+    item_in_wishlist: dict[str, Any],
+) -> None:
+    post_ok(
+        client,
+        f"/api/v1/public/wishlists/{public_wishlist['share_slug']}/items/{item_in_wishlist['id']}/contributions",
         json={"display_name": "Another Friend", "contact": None, "amount": 500.0},
     )
-    assert contribution_response.status_code == 201
 
-    owner_items_response = client.get(
-        f"/api/v1/wishlists/{wishlist_id}/items",
-        headers=headers,
-    )
-    assert owner_items_response.status_code == 200
-    owner_items = owner_items_response.json()
+    owner_items = get_ok(client, f"/api/v1/wishlists/{public_wishlist['id']}/items", headers=owner_headers)
     assert len(owner_items) == 1
     owner_item = owner_items[0]
-    assert owner_item["is_reserved"] is True
+    assert owner_item["is_reserved"] is False
     assert owner_item["collected_amount"] == 500.0
     assert owner_item["contributions_count"] == 1
 
 
-def test_wishlists_are_isolated_between_users() -> None:
-  register_response = client.post(
-      "/api/v1/auth/register",
-      json={
-          "email": "user_a@example.com",
-          "password": "password123",
-          "name": "User A",
-      },
-  )
-  assert register_response.status_code == 201
-
-  login_response = client.post(
-      "/api/v1/auth/login",
-      data={"username": "user_a@example.com", "password": "password123"},
-  )
-  assert login_response.status_code == 200
-  token_a = login_response.json()["access_token"]
-  headers_a = {"Authorization": f"Bearer {token_a}"}
-
-  wishlist_response = client.post(
-      "/api/v1/wishlists/",
-      json={"title": "Private A", "description": None, "is_public": False},
-      headers=headers_a,
-  )
-  assert wishlist_response.status_code == 201
-
-  list_response_a = client.get("/api/v1/wishlists/", headers=headers_a)
-  assert list_response_a.status_code == 200
-  wishlists_a = list_response_a.json()
-  assert any(w["title"] == "Private A" for w in wishlists_a)
-
-  register_b_response = client.post(
-      "/api/v1/auth/register",
-      json={
-          "email": "user_b@example.com",
-          "password": "password123",
-          "name": "User B",
-      },
-  )
-  assert register_b_response.status_code == 201
-
-  login_b_response = client.post(
-      "/api/v1/auth/login",
-      data={"username": "user_b@example.com", "password": "password123"},
-  )
-  assert login_b_response.status_code == 200
-  token_b = login_b_response.json()["access_token"]
-  headers_b = {"Authorization": f"Bearer {token_b}"}
-
-  list_response_b = client.get("/api/v1/wishlists/", headers=headers_b)
-  assert list_response_b.status_code == 200
-  wishlists_b = list_response_b.json()
-  assert all(w["title"] != "Private A" for w in wishlists_b)
-
-
-def test_register_requires_non_empty_name() -> None:
-    response = client.post(
-        "/api/v1/auth/register",
-        json={
-            "email": "noname@example.com",
-            "password": "password123",
-            "name": "",
-        },
-    )
-    assert response.status_code == 422
+def _seed_user(db: Session, email: str, name: str) -> dict[str, str]:
+    # Inserted directly: these tests exercise /wishlists, not registration or password hashing.
+    user = User(email=email, hashed_password="!unused!", name=name)
+    db.add(user)
+    db.commit()
+    return {"Authorization": f"Bearer {create_access_token(str(user.id), user.hashed_password)}"}
 
-    response_spaces = client.post(
-        "/api/v1/auth/register",
-        json={
-            "email": "spaces@example.com",
-            "password": "password123",
-            "name": "   ",
-        },
+
+def test_wishlists_are_isolated_between_users(client: TestClient, db_session: Session) -> None:
+    headers_a = _seed_user(db_session, "user_a@example.com", "User A")
+    headers_b = _seed_user(db_session, "user_b@example.com", "User B")
+
+    post_ok(
+        client,
+        "/api/v1/wishlists/",
+        json={"title": "Private A", "description": None, "is_public": False},
+        headers=headers_a,
     )
-    assert response_spaces.status_code == 422
 
+    wishlists_a = get_ok(client, "/api/v1/wishlists/", headers=headers_a)
+    assert any(w["title"] == "Private A" for w in wishlists_a)
+
+    wishlists_b = get_ok(client, "/api/v1/wishlists/", headers=headers_b)
+    assert all(w["title"] != "Private A" for w in wishlists_b)
 
-def test_realtime_item_updates_over_websocket() -> None:
-    register_response = client.post(
+
+@pytest.mark.parametrize("name", ["", "   ", "\t", "\n"])
+def test_register_requires_non_empty_name(client: TestClient, name: str) -> None:
+    post_ok(
+        client,
         "/api/v1/auth/register",
-        json={
-            "email": "owner@example.com",
-            "password": "password123",
-            "name": "Owner",
-        },
+        json={"email": "noname@example.com", "password": "password123", "name": name},
+        status=422,
     )
-    assert register_response.status_code == 201
 
-    login_response = client.post(
-        "/api/v1/auth/login",
-        data={"username": "owner@example.com", "password": "password123"},
-    )
-    assert login_response.status_code == 200
-    token = login_response.json()["access_token"]
-    headers = {"Authorization": f"Bearer {token}"}
 
-    wishlist_response = client.post(
-        "/api/v1/wishlists/",
-        json={"title": "WS List", "description": None, "is_public": True},
-        headers=headers,
-    )
-    assert wishlist_response.status_code == 201
-    wishlist = wishlist_response.json()
-    wishlist_id = wishlist["id"]
-
-    item_response = client.post(
-        f"/api/v1/wishlists/{wishlist_id}/items",
-        json={
-            "title": "First",
-            "description": None,
-            "url": None,
-            "image_url": None,
-            "price": None,
-            "currency": None,
-        },
-        headers=headers,
+def _receive_json(ws: WebSocketTestSession, timeout: float, pending: Future[Any] | None) -> dict[str, Any]:
+    # receive_json() blocks with no timeout of its own, so it runs on a daemon thread that can be abandoned.
+    outcome: dict[str, Any] = {}
+
+    def receive() -> None:
+        try:
+            outcome["message"] = ws.receive_json()
+        except BaseException as exc:
+            outcome["error"] = exc
+
+    receiver = threading.Thread(target=receive, daemon=True)
+    receiver.start()
+    stop_at = time.monotonic() + timeout
+    while receiver.is_alive() and time.monotonic() < stop_at:
+        # A failed producer will never send the awaited event; surface its error right away.
+        if pending is not None and pending.done() and pending.exception() is not None:
+            raise pending.exception()
+        receiver.join(min(0.05, max(stop_at - time.monotonic(), 0.0)))
+    if receiver.is_alive():
+        raise AssertionError(f"No WebSocket message within {timeout:.2f}s")
+    if "error" in outcome:
+        raise outcome["error"]
+    return outcome["message"]
+
+
+def recv_until(
+    ws: WebSocketTestSession,
+    pred: Callable[[dict[str, Any]], bool],
+    deadline: float = 1.0,
+    pending: Future[Any] | None = None,
+) -> dict[str, Any]:
+    """Receive messages until one matches ``pred``; unrelated messages are dropped.
+
+    Fails once ``deadline`` seconds have passed, even while a receive is still blocked,
+    or as soon as ``pending`` (the work expected to produce the message) raises.
+    """
+    stop_at = time.monotonic() + deadline
+    while True:
+        message = _receive_json(ws, max(stop_at - time.monotonic(), 0.0), pending)
+        if pred(message):
+            return message
+
+
+def test_realtime_item_updates_over_websocket(authed: SimpleNamespace, db_session: Session) -> None:
+    client = authed.client
+    headers = authed.headers
+
+    # Preconditions are seeded directly; only the second item's create and delete go through HTTP.
+    wishlist = Wishlist(
+        owner_id=authed.user_id,
+        title="WS List",
+        is_public=True,
+        share_slug=secrets.token_urlsafe(8),
     )
-    assert item_response.status_code == 201
-
-    with client.websocket_connect(f"/ws/wishlists/{wishlist['share_slug']}") as websocket:
-        # Create a new item and expect ITEM_UPDATED
-        second_item_response = client.post(
-            f"/api/v1/wishlists/{wishlist_id}/items",
-            json={
-                "title": "Second",
-                "description": None,
-                "url": None,
-                "image_url": None,
-                "price": None,
-                "currency": None,
-            },
-            headers=headers,
-        )
-        assert second_item_response.status_code == 201
-        second_item = second_item_response.json()
-
-        message = websocket.receive_json()
-        assert message["type"] == "ITEM_UPDATED"
+    wishlist.items.append(WishlistItem(title="First"))
+    db_session.add(wishlist)
+    db_session.commit()
+    wishlist_id = wishlist.id
+    share_slug = wishlist.share_slug
+
+    def create_then_delete() -> dict[str, Any]:
+        created = post_ok(client, f"/api/v1/wishlists/{wishlist_id}/items", json=SECOND_ITEM_BODY, headers=headers)
+        delete_ok(client, f"/api/v1/wishlists/{wishlist_id}/items/{created['id']}", headers=headers)
+        return created
+
+    with client.websocket_connect(f"/ws/wishlists/{share_slug}") as websocket:
+        # The mutations run on a worker thread so events are received while requests are in flight.
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            mutations = executor.submit(create_then_delete)
+            message = recv_until(
+                websocket,
+                lambda m: m["type"] == "ITEM_UPDATED" and m["item"]["title"] == "Second",
+                pending=mutations,
+            )
+            delete_message = recv_until(
+                websocket,
+                lambda m: m["type"] == "ITEM_UPDATED" and m["item"]["is_deleted"] is True,
+                pending=mutations,
+            )
+            second_item = mutations.result()
+
         assert message["item"]["id"] == second_item["id"]
         assert message["item"]["is_deleted"] is False
+        assert delete_message["item"]["id"] == second_item["id"]
 
-        # Delete the item and expect ITEM_UPDATED with is_deleted=True
-        delete_response = client.delete(
-            f"/api/v1/wishlists/{wishlist_id}/items/{second_item['id']}",
-            headers=headers,
-        )
-        assert delete_response.status_code == 204
 
-        delete_message = websocket.receive_json()
-        assert delete_message["type"] == "ITEM_UPDATED"
-        assert delete_message["item"]["id"] == second_item["id"]
-        assert delete_message["item"]["is_deleted"] is True
+def test_reservation_is_broadcast_from_one_item_select(
+    client: TestClient,
+    engine: Engine,
+    public_wishlist: dict[str, Any],
+    item_in_wishlist: dict[str, Any],
+) -> None:
+    statements: list[str] = []
+
+    def record(conn, cursor, statement, parameters, context, executemany) -> None:
+        statements.append(statement.lstrip().split(None, 1)[0].upper())
+
+    share_slug = public_wishlist["share_slug"]
+    with client.websocket_connect(f"/ws/wishlists/{share_slug}") as websocket:
+        event.listen(engine, "before_cursor_execute", record)
+        try:
+            post_ok(
+                client,
+                f"/api/v1/public/wishlists/{share_slug}/items/{item_in_wishlist['id']}/reserve",
+                json={"display_name": "Friend", "contact": None},
+            )
+        finally:
+            event.remove(engine, "before_cursor_execute", record)
+        message = recv_until(websocket, lambda m: m["type"] == "ITEM_UPDATED")
+
+    assert message["item"]["id"] == item_in_wishlist["id"]
+    assert message["item"]["is_reserved"] is True
+    assert message["item"]["price"] == 1000.0
+    assert [s for s in statements if s in ("INSERT", "SELECT")] == ["INSERT", "SELECT"]